@@ -0,0 +1,255 @@
+# Batched move generation for many positions at once with NumPy.
+#
+# Positions are given as an (N, 12) uint64 array of piece bitboards in Board
+# order (white P N B R Q K, then black; bit n is square rank * 8 + file, so bit 0
+# is a8). Attacks are computed setwise with shifts and Kogge-Stone occluded
+# fills, one array operation covering all N boards. NumPy is optional: the rest
+# of the engine does not need it and this module raises ImportError without it.
+from Chess_Engine_in_python.engine.board import (
+    Color, CASTLE_WHITE_KINGSIDE, CASTLE_WHITE_QUEENSIDE, CASTLE_BLACK_KINGSIDE, CASTLE_BLACK_QUEENSIDE
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+if np is None:
+    raise ImportError("engine.batch requires NumPy (pip install numpy)")
+
+_ALL = np.uint64(0xFFFFFFFFFFFFFFFF)
+_NOT_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+_NOT_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+_NOT_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+_NOT_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+_ONE = np.uint64(1)
+
+# Slider directions as (shift, mask of valid destinations): positive shifts move
+# towards h1 (south/east), negative towards a8 (north/west)
+_ORTHOGONAL = ((1, _NOT_A), (-1, _NOT_H), (8, _ALL), (-8, _ALL))
+_DIAGONAL = ((9, _NOT_A), (7, _NOT_H), (-7, _NOT_A), (-9, _NOT_H))
+
+_KNIGHT_STEPS = ((17, _NOT_A), (15, _NOT_H), (10, _NOT_AB), (6, _NOT_GH),
+                 (-17, _NOT_H), (-15, _NOT_A), (-10, _NOT_GH), (-6, _NOT_AB))
+_KING_STEPS = _ORTHOGONAL + _DIAGONAL
+
+# Ranks by square index: rank 0 holds a8-h8
+_RANK = [np.uint64(0xFF << (8 * rank)) for rank in range(8)]
+
+# Castling moves: side, rights bit, king square, king destination, squares
+# that must be empty and squares that must not be attacked
+_CASTLING = (
+    (0, CASTLE_WHITE_KINGSIDE, 60, 62, (61, 62), (60, 61, 62)),
+    (0, CASTLE_WHITE_QUEENSIDE, 60, 58, (57, 58, 59), (58, 59, 60)),
+    (1, CASTLE_BLACK_KINGSIDE, 4, 6, (5, 6), (4, 5, 6)),
+    (1, CASTLE_BLACK_QUEENSIDE, 4, 2, (1, 2, 3), (2, 3, 4)),
+)
+
+def _squares(*squares):
+    """Bitboard (uint64) of the given squares"""
+    return np.uint64(sum(1 << square for square in squares))
+
+def _shift(bitboards, shift):
+    """Shift bitboards by a signed amount (positive towards higher squares)"""
+    if shift > 0:
+        return bitboards << np.uint64(shift)
+    return bitboards >> np.uint64(-shift)
+
+def _slide(sliders, empty, shift, mask):
+    """Attacks of sliders in one direction (Kogge-Stone occluded fill, then one step)"""
+    empty = empty & mask
+    sliders = sliders | (empty & _shift(sliders, shift))
+    empty = empty & _shift(empty, shift)
+    sliders = sliders | (empty & _shift(sliders, 2 * shift))
+    empty = empty & _shift(empty, 2 * shift)
+    sliders = sliders | (empty & _shift(sliders, 4 * shift))
+    return _shift(sliders, shift) & mask
+
+def _steps(pieces, steps):
+    """Attacks of leapers given their (shift, mask) steps"""
+    attacks = np.zeros_like(pieces)
+    for shift, mask in steps:
+        attacks |= _shift(pieces, shift) & mask
+    return attacks
+
+def _pawn_attacks(pawns, white):
+    """Pawn attacks; white is a boolean array selecting the pawns' color per board"""
+    white_attacks = ((pawns & _NOT_A) >> np.uint64(9)) | ((pawns & _NOT_H) >> np.uint64(7))
+    black_attacks = ((pawns & _NOT_A) << np.uint64(7)) | ((pawns & _NOT_H) << np.uint64(9))
+    return np.where(white, white_attacks, black_attacks)
+
+def _slider_attacks(diagonal, straight, empty):
+    """Attacks of diagonal and straight sliders"""
+    attacks = np.zeros_like(diagonal)
+    for shift, mask in _DIAGONAL:
+        attacks |= _slide(diagonal, empty, shift, mask)
+    for shift, mask in _ORTHOGONAL:
+        attacks |= _slide(straight, empty, shift, mask)
+    return attacks
+
+def popcount(bitboards):
+    """Number of set bits in each element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bitboards).astype(np.int64)
+    x = bitboards - ((bitboards >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+def boards_to_arrays(boards):
+    """Pack Board objects into (bitboards, side_to_move, castling, en_passant) arrays"""
+    bitboards = np.array([board.bitboards for board in boards], dtype=np.uint64).reshape(-1, 12)
+    side_to_move = np.array([0 if board.active_color == Color.WHITE else 1 for board in boards],
+                            dtype=np.int8)
+    castling = np.array([board.castling for board in boards], dtype=np.int8)
+    en_passant = np.array([board.ep_square for board in boards], dtype=np.int8)
+    
+    return bitboards, side_to_move, castling, en_passant
+
+def attack_maps(bitboards, side):
+    """Squares attacked by the given color index (0 white, 1 black, or a per-board array)"""
+    bitboards = np.asarray(bitboards, dtype=np.uint64)
+    white = np.asarray(side) == 0
+    pieces = np.where(white[..., None], bitboards[:, :6], bitboards[:, 6:])
+    occupied = np.bitwise_or.reduce(bitboards, axis=1)
+    return _attacks(pieces, white, ~occupied)
+
+def _attacks(pieces, white, empty):
+    """Squares attacked by (N, 6) piece bitboards of the given colors"""
+    pawns, knights, bishops, rooks, queens, king = pieces.T
+    return (_pawn_attacks(pawns, white) | _steps(knights, _KNIGHT_STEPS)
+            | _steps(king, _KING_STEPS) | _slider_attacks(bishops | queens, rooks | queens, empty))
+
+def generate_move_masks(bitboards, side_to_move, castling=None, en_passant=None, legal=True):
+    """Move targets of every position in a batch.
+    
+    Returns (masks, counts): masks is an (N, 64) uint64 array holding, for each
+    from-square, the bitboard of squares its piece can move to (castling appears
+    as the king's two-square move); counts is an (N,) array of move counts with
+    each promotion counted once per promotion piece, as MoveGenerator lists them.
+    With legal=False the masks are pseudo-legal (pins and checks ignored)."""
+    bitboards = np.asarray(bitboards, dtype=np.uint64)
+    count = len(bitboards)
+    white = np.asarray(side_to_move) == 0
+    castling = np.zeros(count, dtype=np.int8) if castling is None else np.asarray(castling)
+    en_passant = np.full(count, -1, dtype=np.int8) if en_passant is None else np.asarray(en_passant)
+    
+    us = np.where(white[:, None], bitboards[:, :6], bitboards[:, 6:])
+    them = np.where(white[:, None], bitboards[:, 6:], bitboards[:, :6])
+    own = np.bitwise_or.reduce(us, axis=1)
+    enemies = np.bitwise_or.reduce(them, axis=1)
+    occupied = own | enemies
+    empty = ~occupied
+    king = us[:, 5]
+    ep_bitboard = np.where(en_passant >= 0, _ONE << en_passant.clip(0).astype(np.uint64), np.uint64(0))
+    
+    # Enemy attacks with our king lifted, so it cannot step back along a checking line
+    enemy_attacks = _attacks(them, ~white, empty | king)
+    
+    # Checkers, the squares that resolve a single check and pin rays
+    enemy_diagonal = them[:, 2] | them[:, 4]
+    enemy_straight = them[:, 3] | them[:, 4]
+    leaper_checkers = ((_pawn_attacks(king, white) & them[:, 0])
+                       | (_steps(king, _KNIGHT_STEPS) & them[:, 1]))
+    checkers = leaper_checkers.copy()
+    check_mask = leaper_checkers.copy()
+    pins = []
+    for directions, snipers in ((_DIAGONAL, enemy_diagonal), (_ORTHOGONAL, enemy_straight)):
+        for shift, mask in directions:
+            ray = _slide(king, empty, shift, mask)
+            hit = ray & snipers
+            checkers |= hit
+            check_mask |= np.where(hit != 0, ray, np.uint64(0))
+            
+            # An own piece is pinned if removing it exposes the king to a slider on this line
+            blocker = ray & own
+            xray = _slide(king, empty | blocker, shift, mask)
+            pinned = np.where((blocker != 0) & ((xray & snipers) != 0), blocker, np.uint64(0))
+            if pinned.any():
+                pins.append((pinned, xray))
+    
+    checker_count = popcount(checkers)
+    check_mask = np.where(checker_count == 0, _ALL, np.where(checker_count == 1, check_mask, np.uint64(0)))
+    if not legal:
+        check_mask = np.full(count, _ALL)
+        pins = []
+    
+    masks = np.zeros((count, 64), dtype=np.uint64)
+    counts = np.zeros(count, dtype=np.int64)
+    
+    def record(pieces, targets, promotions=None):
+        """Store each board's targets under the square of its (single) piece"""
+        rows = np.nonzero(pieces)[0]
+        squares = popcount(pieces[rows] - _ONE)
+        masks[rows, squares] |= targets[rows]
+        counts[rows] += popcount(targets[rows])
+        if promotions is not None:
+            counts[rows] += 3 * popcount(targets[rows] & promotions[rows])
+    
+    def allowed(pieces):
+        """Squares pieces may move to without exposing or leaving the king in check"""
+        result = check_mask
+        for pinned, ray in pins:
+            result = result & np.where((pinned & pieces) != 0, ray, _ALL)
+        return result
+    
+    def each_piece(pieces):
+        """Yield one piece (lowest bit) per board at a time"""
+        pieces = pieces.copy()
+        while pieces.any():
+            lowest = pieces & (~pieces + _ONE)
+            pieces ^= lowest
+            yield lowest
+    
+    # Knights and sliders
+    for index in (1, 2, 3, 4):
+        for piece in each_piece(us[:, index]):
+            if index == 1:
+                attacks = _steps(piece, _KNIGHT_STEPS)
+            else:
+                diagonal = piece if index in (2, 4) else np.zeros_like(piece)
+                straight = piece if index in (3, 4) else np.zeros_like(piece)
+                attacks = _slider_attacks(diagonal, straight, empty)
+            record(piece, attacks & ~own & allowed(piece))
+    
+    # Pawns: pushes, double pushes, captures, en passant and promotions
+    double_rank = np.where(white, _RANK[5], _RANK[2])
+    promotion_rank = np.where(white, _RANK[0], _RANK[7])
+    for pawn in each_piece(us[:, 0]):
+        single = np.where(white, pawn >> np.uint64(8), pawn << np.uint64(8)) & empty
+        double = np.where(white, (single & double_rank) >> np.uint64(8),
+                          (single & double_rank) << np.uint64(8)) & empty
+        attacks = _pawn_attacks(pawn, white)
+        targets = (single | double | (attacks & enemies)) & allowed(pawn)
+        
+        # En passant: recheck the king with both pawns gone and ours on the target
+        ep_target = attacks & ep_bitboard
+        if ep_target.any():
+            captured = np.where(white, ep_target << np.uint64(8), ep_target >> np.uint64(8))
+            if legal:
+                after = empty ^ pawn ^ captured ^ ep_target
+                exposed = ((_slider_attacks(king, np.zeros_like(king), after) & enemy_diagonal) != 0)
+                exposed |= ((_slider_attacks(np.zeros_like(king), king, after) & enemy_straight) != 0)
+                exposed |= (leaper_checkers & ~captured) != 0
+                ep_target = np.where(exposed & (king != 0), np.uint64(0), ep_target)
+            targets |= ep_target
+        
+        record(pawn, targets, promotion_rank)
+    
+    # King steps and castling
+    king_targets = _steps(king, _KING_STEPS) & ~own
+    if legal:
+        king_targets &= ~enemy_attacks
+    for side, right, from_square, to_square, between, passing in _CASTLING:
+        can_castle = ((white == (side == 0)) & ((castling & right) != 0)
+                      & ((king & _squares(from_square)) != 0)
+                      & ((occupied & _squares(*between)) == 0)
+                      & ((enemy_attacks & _squares(*passing)) == 0))
+        king_targets |= np.where(can_castle, _squares(to_square), np.uint64(0))
+    record(king, king_targets)
+    
+    return masks, counts
+
+def count_moves(bitboards, side_to_move, castling=None, en_passant=None, legal=True):
+    """Number of (legal, by default) moves of every position in a batch"""
+    return generate_move_masks(bitboards, side_to_move, castling, en_passant, legal)[1]
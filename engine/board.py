@@ -1,6 +1,10 @@
 from enum import Enum, auto
-import copy
 from Chess_Engine_in_python.utils.fen import parse_fen, generate_fen
+from Chess_Engine_in_python.utils.bitboard import BitBoard, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS
+from Chess_Engine_in_python.utils.magic import rook_attacks, bishop_attacks
+from Chess_Engine_in_python.utils.zobrist import (
+    ZobristHash, PIECE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_TO_MOVE_KEY
+)
 
 class PieceType(Enum):
     PAWN = auto()
@@ -14,43 +18,157 @@ class Color(Enum):
     WHITE = auto()
     BLACK = auto()
 
+# Move code flags (bits 12-15 of a move code, see engine.move)
+_KING_CASTLE = 2
+_QUEEN_CASTLE = 3
+_EN_PASSANT = 5
+_PROMOTION = 8
+
+def piece_index(piece_type, color):
+    """Index of the bitboard holding pieces of this type and color (0-11)"""
+    return (piece_type.value - 1) + (6 if color == Color.BLACK else 0)
+
+def color_index(color):
+    """Index of the occupancy bitboard for a color (0 white, 1 black)"""
+    return 0 if color == Color.WHITE else 1
+
 class Piece:
-    def __init__(self, piece_type, color):
-        self.piece_type = piece_type
-        self.color = color
+    """Immutable piece. There is exactly one instance per (type, color) pair:
+    Piece(piece_type, color) returns the shared instance from PIECES."""
+    __slots__ = ('piece_type', 'color', 'code', 'color_index', 'symbol')
+    
+    def __new__(cls, piece_type, color):
+        return PIECES[piece_index(piece_type, color)]
+    
+    @classmethod
+    def _create(cls, piece_type, color, symbol):
+        """Build one of the shared instances (only used to fill PIECES)"""
+        piece = object.__new__(cls)
+        object.__setattr__(piece, 'piece_type', piece_type)
+        object.__setattr__(piece, 'color', color)
+        object.__setattr__(piece, 'code', piece_index(piece_type, color))
+        object.__setattr__(piece, 'color_index', color_index(color))
+        object.__setattr__(piece, 'symbol', symbol)
+        return piece
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece objects are immutable")
+    
+    def __reduce__(self):
+        # Unpickle and copy to the shared instance
+        return (Piece, (self.piece_type, self.color))
+    
+    def __repr__(self):
+        return f"Piece({self.piece_type}, {self.color})"
     
     def __str__(self):
-        symbols = {
-            (PieceType.PAWN, Color.WHITE): 'P',
-            (PieceType.KNIGHT, Color.WHITE): 'N',
-            (PieceType.BISHOP, Color.WHITE): 'B',
-            (PieceType.ROOK, Color.WHITE): 'R',
-            (PieceType.QUEEN, Color.WHITE): 'Q',
-            (PieceType.KING, Color.WHITE): 'K',
-            (PieceType.PAWN, Color.BLACK): 'p',
-            (PieceType.KNIGHT, Color.BLACK): 'n',
-            (PieceType.BISHOP, Color.BLACK): 'b',
-            (PieceType.ROOK, Color.BLACK): 'r',
-            (PieceType.QUEEN, Color.BLACK): 'q',
-            (PieceType.KING, Color.BLACK): 'k',
-        }
-        return symbols.get((self.piece_type, self.color), '?')
+        return self.symbol
+
+# The twelve shared pieces, indexed by their code (see piece_index)
+PIECES = [
+    Piece._create(piece_type, color, symbol)
+    for color, symbols in ((Color.WHITE, 'PNBRQK'), (Color.BLACK, 'pnbrqk'))
+    for piece_type, symbol in zip(PieceType, symbols)
+]
+
+# Lookup from FEN symbol to shared piece
+PIECE_FROM_SYMBOL = {piece.symbol: piece for piece in PIECES}
+
+# File masks for shifting pawn attacks without wrapping (square = rank * 8 + file)
+_ALL_SQUARES = 0xFFFFFFFFFFFFFFFF
+_NOT_A_FILE = _ALL_SQUARES ^ 0x0101010101010101
+_NOT_H_FILE = _ALL_SQUARES ^ 0x8080808080808080
+
+# Castling rights bits, in the order of the Zobrist castling keys
+CASTLE_WHITE_KINGSIDE = 1
+CASTLE_WHITE_QUEENSIDE = 2
+CASTLE_BLACK_KINGSIDE = 4
+CASTLE_BLACK_QUEENSIDE = 8
+
+# Rights kept when a move starts or ends on a square: moving a king or rook
+# from its home square, or capturing a rook on it, loses the matching rights
+_CASTLING_KEPT = [15] * 64
+_CASTLING_KEPT[60] = 15 ^ (CASTLE_WHITE_KINGSIDE | CASTLE_WHITE_QUEENSIDE)
+_CASTLING_KEPT[63] = 15 ^ CASTLE_WHITE_KINGSIDE
+_CASTLING_KEPT[56] = 15 ^ CASTLE_WHITE_QUEENSIDE
+_CASTLING_KEPT[4] = 15 ^ (CASTLE_BLACK_KINGSIDE | CASTLE_BLACK_QUEENSIDE)
+_CASTLING_KEPT[7] = 15 ^ CASTLE_BLACK_KINGSIDE
+_CASTLING_KEPT[0] = 15 ^ CASTLE_BLACK_QUEENSIDE
+
+# Zobrist key of every castling rights mask
+_CASTLING_HASH = [0] * 16
+for _rights in range(16):
+    for _i in range(4):
+        if _rights >> _i & 1:
+            _CASTLING_HASH[_rights] ^= CASTLING_KEYS[_i]
+
+# Attacker counts are kept bit-sliced: for each side, _COUNT_BITS bitboards hold
+# bit i of the number of that side's pieces attacking each square, so a piece's
+# whole attack set is added or removed with a few word-wide carry steps
+_COUNT_BITS = 5
+
+def _add_attacks(counts, base, attacks):
+    """Count one more attacker on every square of attacks"""
+    for i in range(base, base + _COUNT_BITS):
+        plane = counts[i]
+        counts[i] = plane ^ attacks
+        attacks &= plane
+        if not attacks:
+            return
+
+# Attack tables of the pieces whose attacks do not depend on occupancy, by piece
+# code (white P N B R Q K, then black); None for the sliders
+_LEAPER_ATTACKS = (PAWN_ATTACKS[0], KNIGHT_ATTACKS, None, None, None, KING_ATTACKS,
+                   PAWN_ATTACKS[1], KNIGHT_ATTACKS, None, None, None, KING_ATTACKS)
+
+def _maps_from_counts(counts):
+    """Per-color attack maps: the squares with a non-zero attacker count"""
+    return [counts[0] | counts[1] | counts[2] | counts[3] | counts[4],
+            counts[5] | counts[6] | counts[7] | counts[8] | counts[9]]
 
 class Board:
+    __slots__ = ('bitboards', 'occupancy', 'mailbox', 'king_squares', 'active_color',
+                 'castling', 'ep_square', 'halfmove_clock', 'fullmove_number',
+                 'zobrist_key', '_undo_stack', 'attack_maps', '_square_attacks', '_attack_counts',
+                 '_attack_stack')
+    
     def __init__(self, fen=None):
-        # Initialize an 8x8 board with None (empty squares)
-        self.squares = [[None for _ in range(8)] for _ in range(8)]
+        # Piece bitboards indexed by piece_index: white P N B R Q K, then black.
+        # Bit n is the square rank * 8 + file, so bit 0 is a8 and bit 63 is h1.
+        self.bitboards = [0] * 12
+        
+        # Occupancy bitboards per color (see color_index)
+        self.occupancy = [0, 0]
+        
+        # Square-indexed piece lookup kept in sync with the bitboards
+        self.mailbox = [None] * 64
+        
+        # King square per color index (-1 if the color has no king)
+        self.king_squares = [-1, -1]
         
         # Game state
         self.active_color = Color.WHITE
-        self.castling_rights = {
-            Color.WHITE: {'kingside': True, 'queenside': True},
-            Color.BLACK: {'kingside': True, 'queenside': True}
-        }
-        self.en_passant_target = None  # Square coordinates or None
+        self.castling = 15  # Castling rights bits (CASTLE_*)
+        self.ep_square = -1  # En passant target square (0-63) or -1
         self.halfmove_clock = 0  # For 50-move rule
         self.fullmove_number = 1  # Incremented after Black's move
         
+        # Zobrist key of the position, updated incrementally as moves are made
+        self.zobrist_key = 0
+        
+        # Undo records for moves made with push(), most recent last
+        self._undo_stack = []
+        
+        # Optional per-color attack bitboards kept up to date by push()/pop()
+        # (None unless enabled with set_attack_tracking), the attacks of the piece
+        # on each square, the per-square attacker counts (see _add_attacks) and
+        # all three for earlier positions for pop() to restore. The lists are
+        # replaced, never modified, once built.
+        self.attack_maps = None
+        self._square_attacks = None
+        self._attack_counts = None
+        self._attack_stack = []
+        
         # Initialize from FEN if provided, otherwise use starting position
         if fen:
             self.load_from_fen(fen)
@@ -61,145 +179,521 @@ class Board:
         """Load board position from FEN string"""
         board_state, active_color, castling, en_passant, halfmove, fullmove = parse_fen(fen)
         
+        # Clear any previous position
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.mailbox = [None] * 64
+        self.king_squares = [-1, -1]
+        self._undo_stack = []
+        
         # Set pieces on the board
         for rank in range(8):
             for file in range(8):
                 piece_char = board_state[rank][file]
                 if piece_char != '.':
-                    self.squares[rank][file] = self._char_to_piece(piece_char)
+                    self._put_piece(self._char_to_piece(piece_char), rank * 8 + file)
         
         # Set game state
         self.active_color = Color.WHITE if active_color == 'w' else Color.BLACK
         
         # Set castling rights
-        self.castling_rights = {
-            Color.WHITE: {'kingside': 'K' in castling, 'queenside': 'Q' in castling},
-            Color.BLACK: {'kingside': 'k' in castling, 'queenside': 'q' in castling}
-        }
+        self.castling = (('K' in castling and CASTLE_WHITE_KINGSIDE)
+                         | ('Q' in castling and CASTLE_WHITE_QUEENSIDE)
+                         | ('k' in castling and CASTLE_BLACK_KINGSIDE)
+                         | ('q' in castling and CASTLE_BLACK_QUEENSIDE))
         
-        # Set en passant target
-        self.en_passant_target = en_passant if en_passant != '-' else None
+        # Set en passant target, converting algebraic notation (e.g. "d6") to a square index
+        if en_passant != '-':
+            self.ep_square = (8 - int(en_passant[1])) * 8 + ord(en_passant[0]) - ord('a')
+        else:
+            self.ep_square = -1
         
         # Set move counters
         self.halfmove_clock = int(halfmove)
         self.fullmove_number = int(fullmove)
+        
+        # Hash the new position from scratch; moves then update it incrementally
+        self.zobrist_key = ZobristHash().hash(self)
+        
+        # Attack maps of the new position, if tracked
+        self._attack_stack = []
+        if self.attack_maps is not None:
+            self._rebuild_attacks()
     
     def _char_to_piece(self, char):
-        """Convert character to piece object"""
-        piece_map = {
-            'P': (PieceType.PAWN, Color.WHITE),
-            'N': (PieceType.KNIGHT, Color.WHITE),
-            'B': (PieceType.BISHOP, Color.WHITE),
-            'R': (PieceType.ROOK, Color.WHITE),
-            'Q': (PieceType.QUEEN, Color.WHITE),
-            'K': (PieceType.KING, Color.WHITE),
-            'p': (PieceType.PAWN, Color.BLACK),
-            'n': (PieceType.KNIGHT, Color.BLACK),
-            'b': (PieceType.BISHOP, Color.BLACK),
-            'r': (PieceType.ROOK, Color.BLACK),
-            'q': (PieceType.QUEEN, Color.BLACK),
-            'k': (PieceType.KING, Color.BLACK),
-        }
-        if char in piece_map:
-            piece_type, color = piece_map[char]
-            return Piece(piece_type, color)
-        return None
+        """Convert character to the shared piece object"""
+        return PIECE_FROM_SYMBOL.get(char)
+    
+    def _put_piece(self, piece, square):
+        """Place a piece on an empty square, updating bitboards and mailbox"""
+        bit = 1 << square
+        self.bitboards[piece.code] |= bit
+        self.occupancy[piece.color_index] |= bit
+        self.mailbox[square] = piece
+        self.zobrist_key ^= PIECE_KEYS[piece.code * 64 + square]
+        if piece.piece_type is PieceType.KING:
+            self.king_squares[piece.color_index] = square
+    
+    def _remove_piece(self, square):
+        """Remove and return the piece on a square (None if empty)"""
+        piece = self.mailbox[square]
+        if piece:
+            mask = ~(1 << square)
+            self.bitboards[piece.code] &= mask
+            self.occupancy[piece.color_index] &= mask
+            self.mailbox[square] = None
+            self.zobrist_key ^= PIECE_KEYS[piece.code * 64 + square]
+            if piece.piece_type is PieceType.KING:
+                self.king_squares[piece.color_index] = -1
+        return piece
     
     def to_fen(self):
         """Convert current board state to FEN string"""
         return generate_fen(self)
     
+    def copy(self):
+        """Return an independent copy of the board, including its undo stack"""
+        new_board = Board.__new__(Board)
+        new_board.bitboards = self.bitboards[:]
+        new_board.occupancy = self.occupancy[:]
+        new_board.mailbox = self.mailbox[:]
+        new_board.king_squares = self.king_squares[:]
+        new_board.active_color = self.active_color
+        new_board.castling = self.castling
+        new_board.ep_square = self.ep_square
+        new_board.halfmove_clock = self.halfmove_clock
+        new_board.fullmove_number = self.fullmove_number
+        new_board.zobrist_key = self.zobrist_key
+        new_board._undo_stack = self._undo_stack[:]
+        new_board.attack_maps = self.attack_maps
+        new_board._square_attacks = self._square_attacks
+        new_board._attack_counts = self._attack_counts
+        new_board._attack_stack = self._attack_stack[:]
+        return new_board
+    
     def make_move(self, move):
-        """Execute a move on the board and update game state"""
-        # Create a copy of the board to avoid modifying the original
-        new_board = copy.deepcopy(self)
-        
-        # Extract move information
-        from_rank, from_file = move.from_square
-        to_rank, to_file = move.to_square
-        
-        # Get the piece being moved
-        piece = new_board.squares[from_rank][from_file]
-        
-        # Handle special moves
-        if move.is_castling:
-            # Implement castling logic
-            if to_file > from_file:  # Kingside
-                # Move rook
-                rook = new_board.squares[from_rank][7]
-                new_board.squares[from_rank][5] = rook
-                new_board.squares[from_rank][7] = None
-            else:  # Queenside
-                # Move rook
-                rook = new_board.squares[from_rank][0]
-                new_board.squares[from_rank][3] = rook
-                new_board.squares[from_rank][0] = None
-        
-        elif move.is_en_passant:
-            # Remove the captured pawn
-            capture_rank = from_rank
-            capture_file = to_file
-            new_board.squares[capture_rank][capture_file] = None
-        
-        # Move the piece
-        new_board.squares[to_rank][to_file] = piece
-        new_board.squares[from_rank][from_file] = None
-        
-        # Handle promotion
-        if move.promotion_piece:
-            new_board.squares[to_rank][to_file] = Piece(move.promotion_piece, piece.color)
-        
-        # Update castling rights
-        if piece.piece_type == PieceType.KING:
-            new_board.castling_rights[piece.color]['kingside'] = False
-            new_board.castling_rights[piece.color]['queenside'] = False
-        
-        if piece.piece_type == PieceType.ROOK:
-            if from_file == 0:  # Queenside rook
-                new_board.castling_rights[piece.color]['queenside'] = False
-            elif from_file == 7:  # Kingside rook
-                new_board.castling_rights[piece.color]['kingside'] = False
+        """Execute a move on a copy of the board and return the new board"""
+        new_board = self.copy()
+        new_board.push(move)
+        return new_board
+    
+    def push(self, move):
+        """Execute a move in place, recording what is needed to undo it with pop()"""
+        # Extract move information from the packed move code (see engine.move)
+        code = move.code
+        from_sq = code & 63
+        to_sq = (code >> 6) & 63
+        flags = code >> 12
+        from_rank, from_file = from_sq >> 3, from_sq & 7
+        to_rank = to_sq >> 3
+        key = self.zobrist_key
+        
+        old_white, old_black = self.occupancy
+        
+        # Lift the piece being moved and anything it captures
+        piece = self._remove_piece(from_sq)
+        if flags == _EN_PASSANT:
+            # The captured pawn sits beside the moving pawn
+            captured = self._remove_piece(from_rank * 8 + (to_sq & 7))
+        else:
+            captured = self._remove_piece(to_sq)
+        
+        # Save the irreversible state before changing it
+        rights = self.castling
+        self._undo_stack.append((
+            move, piece, captured, rights,
+            self.ep_square, self.halfmove_clock, key
+        ))
+        
+        # Move the rook when castling
+        if flags == _KING_CASTLE:
+            self._put_piece(self._remove_piece(from_rank * 8 + 7), from_rank * 8 + 5)
+        elif flags == _QUEEN_CASTLE:
+            self._put_piece(self._remove_piece(from_rank * 8), from_rank * 8 + 3)
+        
+        # Move the piece, promoting it if required
+        if flags & _PROMOTION:
+            self._put_piece(Piece(move.promotion_piece, piece.color), to_sq)
+        else:
+            self._put_piece(piece, to_sq)
+        
+        # Update castling rights and hash out the ones just lost
+        new_rights = rights & _CASTLING_KEPT[from_sq] & _CASTLING_KEPT[to_sq]
+        if piece.piece_type is PieceType.KING:
+            new_rights &= ~(3 << (piece.color_index * 2))
+        if new_rights != rights:
+            self.castling = new_rights
+            self.zobrist_key ^= _CASTLING_HASH[rights] ^ _CASTLING_HASH[new_rights]
         
         # Update en passant target
-        if piece.piece_type == PieceType.PAWN and abs(to_rank - from_rank) == 2:
+        if self.ep_square >= 0:
+            self.zobrist_key ^= EN_PASSANT_KEYS[self.ep_square & 7]
+        if piece.piece_type is PieceType.PAWN and abs(to_rank - from_rank) == 2:
             # Set en passant target square
-            ep_rank = (from_rank + to_rank) // 2
-            new_board.en_passant_target = (ep_rank, from_file)
+            self.ep_square = (from_sq + to_sq) >> 1
+            self.zobrist_key ^= EN_PASSANT_KEYS[from_file]
         else:
-            new_board.en_passant_target = None
+            self.ep_square = -1
         
         # Update halfmove clock
-        if piece.piece_type == PieceType.PAWN or move.is_capture:
-            new_board.halfmove_clock = 0
+        if piece.piece_type == PieceType.PAWN or captured:
+            self.halfmove_clock = 0
         else:
-            new_board.halfmove_clock += 1
+            self.halfmove_clock += 1
         
         # Update fullmove number
         if piece.color == Color.BLACK:
-            new_board.fullmove_number += 1
+            self.fullmove_number += 1
         
         # Switch active color
-        new_board.active_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
+        self.active_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
+        self.zobrist_key ^= SIDE_TO_MOVE_KEY
         
-        return new_board
+        # Update the attack maps, keeping the old ones for pop()
+        if self.attack_maps is not None:
+            self._update_attacks(from_sq, to_sq, flags, old_white, old_white | old_black)
+    
+    def pop(self):
+        """Undo the last move made with push() and return it"""
+        move, piece, captured, rights, ep_square, halfmove_clock, key = self._undo_stack.pop()
+        
+        code = move.code
+        from_sq = code & 63
+        to_sq = (code >> 6) & 63
+        flags = code >> 12
+        
+        # Put the moving piece back (this also undoes a promotion)
+        self._remove_piece(to_sq)
+        self._put_piece(piece, from_sq)
+        
+        # Restore the captured piece
+        if captured:
+            if flags == _EN_PASSANT:
+                self._put_piece(captured, (from_sq & ~7) | (to_sq & 7))
+            else:
+                self._put_piece(captured, to_sq)
+        
+        # Move the rook back when castling
+        if flags == _KING_CASTLE:
+            self._put_piece(self._remove_piece(from_sq + 1), from_sq + 3)
+        elif flags == _QUEEN_CASTLE:
+            self._put_piece(self._remove_piece(from_sq - 1), from_sq - 4)
+        
+        # Restore game state
+        self.castling = rights
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        if piece.color == Color.BLACK:
+            self.fullmove_number -= 1
+        self.active_color = piece.color
+        self.zobrist_key = key
+        
+        # Restore the attack maps (recomputed if tracking began after this move)
+        if self.attack_maps is not None:
+            saved = self._attack_stack.pop() if self._attack_stack else None
+            if saved is None:
+                self._rebuild_attacks()
+            else:
+                self.attack_maps, self._square_attacks, self._attack_counts = saved
+        
+        return move
+    
+    @property
+    def castling_rights(self):
+        """Castling rights as {color: {'kingside': bool, 'queenside': bool}} (a copy)"""
+        return {
+            Color.WHITE: {'kingside': bool(self.castling & CASTLE_WHITE_KINGSIDE),
+                          'queenside': bool(self.castling & CASTLE_WHITE_QUEENSIDE)},
+            Color.BLACK: {'kingside': bool(self.castling & CASTLE_BLACK_KINGSIDE),
+                          'queenside': bool(self.castling & CASTLE_BLACK_QUEENSIDE)}
+        }
+    
+    @castling_rights.setter
+    def castling_rights(self, rights):
+        castling = 0
+        for color, shift in ((Color.WHITE, 0), (Color.BLACK, 2)):
+            castling |= (bool(rights[color]['kingside']) | bool(rights[color]['queenside']) << 1) << shift
+        self.zobrist_key ^= _CASTLING_HASH[self.castling] ^ _CASTLING_HASH[castling]
+        self.castling = castling
+    
+    @property
+    def en_passant_target(self):
+        """En passant target as (rank, file), or None"""
+        return divmod(self.ep_square, 8) if self.ep_square >= 0 else None
+    
+    @en_passant_target.setter
+    def en_passant_target(self, target):
+        if self.ep_square >= 0:
+            self.zobrist_key ^= EN_PASSANT_KEYS[self.ep_square & 7]
+        self.ep_square = target[0] * 8 + target[1] if target else -1
+        if self.ep_square >= 0:
+            self.zobrist_key ^= EN_PASSANT_KEYS[self.ep_square & 7]
     
     def get_piece_at(self, rank, file):
         """Get the piece at the specified square"""
         if 0 <= rank < 8 and 0 <= file < 8:
-            return self.squares[rank][file]
+            return self.mailbox[rank * 8 + file]
         return None
     
+    @property
+    def squares(self):
+        """Read-only 8x8 [rank][file] view of the board, built from the mailbox"""
+        return [self.mailbox[rank * 8:rank * 8 + 8] for rank in range(8)]
+    
+    def find_king(self, color):
+        """(rank, file) of the king of the given color, or None if it has none"""
+        square = self.king_squares[color_index(color)]
+        return divmod(square, 8) if square >= 0 else None
+    
+    def piece_squares(self, color):
+        """Squares (0-63) holding pieces of the given color, in ascending order"""
+        squares = []
+        pieces = self.occupancy[color_index(color)]
+        while pieces:
+            squares.append((pieces & -pieces).bit_length() - 1)
+            pieces &= pieces - 1
+        return squares
+    
+    @property
+    def occupied(self):
+        """Bitboard (int) of all occupied squares"""
+        return self.occupancy[0] | self.occupancy[1]
+    
+    def get_bitboard(self, piece_type, color):
+        """Get the bitboard of pieces of the given type and color"""
+        return BitBoard(self.bitboards[piece_index(piece_type, color)])
+    
+    def get_occupancy(self, color=None):
+        """Get the occupancy bitboard of a color, or of both colors if None"""
+        if color is None:
+            return BitBoard(self.occupied)
+        return BitBoard(self.occupancy[color_index(color)])
+    
     def is_square_attacked(self, rank, file, by_color):
         """Check if a square is attacked by any piece of the specified color"""
-        # Implementation will be added
-        pass
+        return self.is_square_index_attacked(rank * 8 + file, 0 if by_color == Color.WHITE else 1)
+    
+    def is_square_index_attacked(self, square, by_side):
+        """Check if a square (0-63) is attacked by the side with color index by_side"""
+        if self.attack_maps is not None:
+            return bool(self.attack_maps[by_side] >> square & 1)
+        
+        bitboards = self.bitboards
+        base = by_side * 6
+        
+        # Leapers first: a pawn of by_side attacks the square if a pawn of the
+        # other color standing on the square would attack it
+        if PAWN_ATTACKS[by_side ^ 1][square] & bitboards[base]:
+            return True
+        if KNIGHT_ATTACKS[square] & bitboards[base + 1]:
+            return True
+        if KING_ATTACKS[square] & bitboards[base + 5]:
+            return True
+        
+        # Sliders
+        occupied = self.occupancy[0] | self.occupancy[1]
+        queens = bitboards[base + 4]
+        diagonal = bitboards[base + 2] | queens
+        if diagonal and bishop_attacks(square, occupied) & diagonal:
+            return True
+        straight = bitboards[base + 3] | queens
+        if straight and rook_attacks(square, occupied) & straight:
+            return True
+        
+        return False
+    
+    def set_attack_tracking(self, enabled=True):
+        """Maintain per-color attack maps on every push()/pop() instead of
+        computing attacks on demand"""
+        if not enabled:
+            self.attack_maps = None
+            self._square_attacks = None
+            self._attack_counts = None
+            self._attack_stack = []
+        elif self.attack_maps is None:
+            self._rebuild_attacks()
+            # Positions before this point are recomputed when popped back to
+            self._attack_stack = [None] * len(self._undo_stack)
+    
+    def _piece_attacks(self, square, occupied):
+        """Squares attacked by the piece on a square (0 if it is empty)"""
+        piece = self.mailbox[square]
+        if piece is None:
+            return 0
+        table = _LEAPER_ATTACKS[piece.code]
+        if table is not None:
+            return table[square]
+        piece_type = piece.piece_type
+        if piece_type is PieceType.BISHOP:
+            return bishop_attacks(square, occupied)
+        if piece_type is PieceType.ROOK:
+            return rook_attacks(square, occupied)
+        return bishop_attacks(square, occupied) | rook_attacks(square, occupied)
+    
+    def _rebuild_attacks(self):
+        """Compute the attacks of every piece, the attacker counts and both attack maps from scratch"""
+        occupied = self.occupancy[0] | self.occupancy[1]
+        self._square_attacks = [self._piece_attacks(square, occupied) for square in range(64)]
+        counts = [0] * (2 * _COUNT_BITS)
+        for square in range(64):
+            if occupied >> square & 1:
+                side = self.mailbox[square].color_index
+                _add_attacks(counts, side * _COUNT_BITS, self._square_attacks[square])
+        self._attack_counts = counts
+        self.attack_maps = _maps_from_counts(counts)
+    
+    def _update_attacks(self, from_sq, to_sq, flags, old_white, old_occupied):
+        """Update the tracked attacks after push() has moved the pieces: only the
+        pieces on squares the move touched, and the sliders whose attacks reach a
+        square that was emptied or filled, are looked up again, and only their
+        attacks are taken out of and added to the attacker counts"""
+        self._attack_stack.append((self.attack_maps, self._square_attacks, self._attack_counts))
+        square_attacks = self._square_attacks[:]
+        counts = self._attack_counts[:]
+        white = self.occupancy[0]
+        occupied = white | self.occupancy[1]
+        
+        # Squares whose occupant changed
+        touched = (1 << from_sq) | (1 << to_sq)
+        if flags == _EN_PASSANT:
+            touched |= 1 << ((from_sq & ~7) | (to_sq & 7))
+        elif flags == _KING_CASTLE:
+            touched |= (1 << (from_sq + 3)) | (1 << (from_sq + 1))
+        elif flags == _QUEEN_CASTLE:
+            touched |= (1 << (from_sq - 4)) | (1 << (from_sq - 1))
+        
+        # Sliders that reached a square whose occupancy changed now see through it or
+        # stop at it; their stored attacks tell which ones did
+        changed = occupied ^ old_occupied
+        bitboards = self.bitboards
+        sliders = (bitboards[2] | bitboards[3] | bitboards[4]
+                   | bitboards[8] | bitboards[9] | bitboards[10]) & ~touched
+        while sliders:
+            bit = sliders & -sliders
+            sliders ^= bit
+            if square_attacks[bit.bit_length() - 1] & changed:
+                touched |= bit
+        
+        # Swap the old attacks of each affected square for the new ones, with the
+        # counter steps of _add_attacks inlined (removal borrows instead of carrying)
+        mailbox = self.mailbox
+        while touched:
+            bit = touched & -touched
+            touched ^= bit
+            square = bit.bit_length() - 1
+            attacks = square_attacks[square]
+            if attacks:
+                i = 0 if old_white & bit else _COUNT_BITS
+                while attacks:
+                    plane = counts[i]
+                    counts[i] = plane ^ attacks
+                    attacks &= ~plane
+                    i += 1
+            piece = mailbox[square]
+            if piece is None:
+                square_attacks[square] = 0
+                continue
+            table = _LEAPER_ATTACKS[piece.code]
+            if table is not None:
+                attacks = table[square]
+            elif piece.piece_type is PieceType.BISHOP:
+                attacks = bishop_attacks(square, occupied)
+            elif piece.piece_type is PieceType.ROOK:
+                attacks = rook_attacks(square, occupied)
+            else:
+                attacks = bishop_attacks(square, occupied) | rook_attacks(square, occupied)
+            square_attacks[square] = attacks
+            i = 0 if white & bit else _COUNT_BITS
+            while attacks:
+                plane = counts[i]
+                counts[i] = plane ^ attacks
+                attacks &= plane
+                i += 1
+        self._square_attacks = square_attacks
+        self._attack_counts = counts
+        self.attack_maps = _maps_from_counts(counts)
+    
+    def compute_attacks(self, side):
+        """Bitboard of every square attacked by the side with color index side"""
+        bitboards = self.bitboards
+        base = side * 6
+        occupied = self.occupancy[0] | self.occupancy[1]
+        
+        # Pawns attack diagonally forward, without wrapping around the board edge
+        pawns = bitboards[base]
+        if side == 0:
+            attacks = ((pawns & _NOT_A_FILE) >> 9) | ((pawns & _NOT_H_FILE) >> 7)
+        else:
+            attacks = (((pawns & _NOT_A_FILE) << 7) | ((pawns & _NOT_H_FILE) << 9)) & _ALL_SQUARES
+        
+        knights = bitboards[base + 1]
+        while knights:
+            attacks |= KNIGHT_ATTACKS[(knights & -knights).bit_length() - 1]
+            knights &= knights - 1
+        
+        # Queens are both diagonal and straight sliders
+        diagonal = bitboards[base + 2] | bitboards[base + 4]
+        while diagonal:
+            attacks |= bishop_attacks((diagonal & -diagonal).bit_length() - 1, occupied)
+            diagonal &= diagonal - 1
+        straight = bitboards[base + 3] | bitboards[base + 4]
+        while straight:
+            attacks |= rook_attacks((straight & -straight).bit_length() - 1, occupied)
+            straight &= straight - 1
+        
+        king = bitboards[base + 5]
+        if king:
+            attacks |= KING_ATTACKS[king.bit_length() - 1]
+        
+        return attacks
+    
+    def attackers_to(self, square, by_side, occupied=None):
+        """Bitboard of the pieces of color index by_side attacking a square (0-63)"""
+        if occupied is None:
+            occupied = self.occupancy[0] | self.occupancy[1]
+        bitboards = self.bitboards
+        base = by_side * 6
+        queens = bitboards[base + 4]
+        return ((PAWN_ATTACKS[by_side ^ 1][square] & bitboards[base])
+                | (KNIGHT_ATTACKS[square] & bitboards[base + 1])
+                | (KING_ATTACKS[square] & bitboards[base + 5])
+                | (bishop_attacks(square, occupied) & (bitboards[base + 2] | queens))
+                | (rook_attacks(square, occupied) & (bitboards[base + 3] | queens)))
+    
+    def is_check(self):
+        """Check if the side to move is in check"""
+        side = 0 if self.active_color == Color.WHITE else 1
+        king_sq = self.king_squares[side]
+        return king_sq >= 0 and self.is_square_index_attacked(king_sq, side ^ 1)
+    
+    def has_legal_move(self):
+        """Check if the side to move has at least one legal move"""
+        from Chess_Engine_in_python.engine.move import MoveGenerator
+        return MoveGenerator(self).has_legal_move()
+    
+    def is_checkmate(self):
+        """Check if the side to move is checkmated"""
+        return self.is_check() and not self.has_legal_move()
+    
+    def is_stalemate(self):
+        """Check if the side to move is stalemated"""
+        return not self.is_check() and not self.has_legal_move()
+    
+    def __hash__(self):
+        """Hash positions by their Zobrist key"""
+        return self.zobrist_key
+    
+    def __eq__(self, other):
+        """Positions are equal when their Zobrist keys match"""
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.zobrist_key == other.zobrist_key
     
     def __str__(self):
         """String representation of the board"""
         result = ""
         for rank in range(8):
-            for file in range(8):
-                piece = self.squares[rank][file]
+            for piece in self.mailbox[rank * 8:rank * 8 + 8]:
                 result += str(piece) if piece else "."
             result += "\n"
         return result
@@ -1,7 +1,9 @@
 import os
 import json
-from Chess_Engine_in_python.engine.board import Board, Color, PieceType
-from Chess_Engine_in_python.engine.move import MoveGenerator
+from Chess_Engine_in_python.engine.board import Board, Color, PieceType, PIECES
+from Chess_Engine_in_python.engine.move import NodeContext
+from Chess_Engine_in_python.utils.bitboard import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS
+from Chess_Engine_in_python.utils.magic import rook_attacks, bishop_attacks
 
 class Evaluator:
     def __init__(self):
@@ -15,8 +17,20 @@ class Evaluator:
             PieceType.KING: 20000  # High value to ensure king safety
         }
         
+        # Material values indexed by piece code, signed white positive / black negative
+        self.code_values = [
+            self.piece_values[piece.piece_type] if piece.color == Color.WHITE
+            else -self.piece_values[piece.piece_type]
+            for piece in PIECES
+        ]
+        
         # Load piece-square tables
         self.piece_tables = self._load_piece_tables()
+        
+        # Flattened, signed square tables indexed [piece code][square] for the
+        # middlegame and endgame (they differ only for the kings)
+        self.middle_square_tables = self._build_square_tables("king_middle")
+        self.end_square_tables = self._build_square_tables("king_end")
     
     def _load_piece_tables(self):
         """Load piece-square tables from JSON file"""
@@ -28,6 +42,27 @@ class Evaluator:
             # Use default tables if file not found or invalid
             return self._default_piece_tables()
     
+    def _build_square_tables(self, king_table):
+        """Flatten the piece-square tables into 64-entry lists per piece code,
+        mirrored for black and negated so scores are from white's perspective"""
+        names = {
+            PieceType.PAWN: "pawn",
+            PieceType.KNIGHT: "knight",
+            PieceType.BISHOP: "bishop",
+            PieceType.ROOK: "rook",
+            PieceType.QUEEN: "queen",
+            PieceType.KING: king_table,
+        }
+        tables = []
+        for piece in PIECES:
+            table = self.piece_tables[names[piece.piece_type]]
+            if piece.color == Color.WHITE:
+                tables.append([table[square // 8][square % 8] for square in range(64)])
+            else:
+                # Flip board for black pieces
+                tables.append([-table[7 - square // 8][square % 8] for square in range(64)])
+        return tables
+    
     def _default_piece_tables(self):
         """Default piece-square tables if file not available"""
         return {
@@ -103,17 +138,14 @@ class Evaluator:
             ]
         }
     
-    def evaluate(self, board):
-        """Evaluate the current board position"""
+    def evaluate(self, board, context=None):
+        """Evaluate the current board position, reusing the search node's context if given"""
+        if context is None:
+            context = NodeContext(board)
+        
         # If checkmate, return extreme value
-        move_generator = MoveGenerator(board)
-        legal_moves = move_generator.generate_legal_moves()
-        
-        if not legal_moves:
-            # Check if king is in check
-            king_pos = self._find_king(board, board.active_color)
-            if king_pos and board.is_square_attacked(king_pos[0], king_pos[1], 
-                                                   Color.BLACK if board.active_color == Color.WHITE else Color.WHITE):
+        if not context.has_legal_move():
+            if context.in_check:
                 # Checkmate
                 return -10000 if board.active_color == Color.WHITE else 10000
             else:
@@ -126,83 +158,107 @@ class Evaluator:
         # Piece-square table evaluation
         position_score = self._evaluate_position(board)
         
-        # Mobility evaluation (number of legal moves)
-        mobility_score = len(legal_moves) * 5  # 5 points per legal move
+        # Mobility evaluation (number of moves of the side to move)
+        mobility_score = self._evaluate_mobility(board) * 5  # 5 points per move
+        if board.active_color == Color.BLACK:
+            mobility_score = -mobility_score
         
         # Pawn structure evaluation
         pawn_structure_score = self._evaluate_pawn_structure(board)
         
         # King safety
-        king_safety_score = self._evaluate_king_safety(board)
+        king_safety_score = self._evaluate_king_safety(board, context.king_squares)
         
         # Total score
         total_score = material_score + position_score + mobility_score + pawn_structure_score + king_safety_score
         
         # Return score from white's perspective
-        return total_score if board.active_color == Color.WHITE else -total_score
+        return total_score
     
     def _evaluate_material(self, board):
         """Evaluate material balance"""
-        white_score = 0
-        black_score = 0
+        score = 0
+        code_values = self.code_values
         
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece:
-                    value = self.piece_values[piece.piece_type]
-                    if piece.color == Color.WHITE:
-                        white_score += value
-                    else:
-                        black_score += value
+        for code, bitboard in enumerate(board.bitboards):
+            if bitboard:
+                score += bitboard.bit_count() * code_values[code]
         
-        return white_score - black_score
+        return score
     
     def _evaluate_position(self, board):
         """Evaluate piece positions using piece-square tables"""
-        white_score = 0
-        black_score = 0
+        bitboards = board.bitboards
         
-        # Determine game phase (middle or endgame)
+        # Determine game phase (middle or endgame) from knights, bishops, rooks and queens
         total_material = 0
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece and piece.piece_type != PieceType.KING and piece.piece_type != PieceType.PAWN:
-                    total_material += self.piece_values[piece.piece_type]
+        for code in (1, 2, 3, 4, 7, 8, 9, 10):
+            total_material += bitboards[code].bit_count() * abs(self.code_values[code])
         
         is_endgame = total_material < 2500  # Threshold for endgame
+        tables = self.end_square_tables if is_endgame else self.middle_square_tables
         
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece:
-                    # Get appropriate piece-square table
-                    if piece.piece_type == PieceType.PAWN:
-                        table = self.piece_tables["pawn"]
-                    elif piece.piece_type == PieceType.KNIGHT:
-                        table = self.piece_tables["knight"]
-                    elif piece.piece_type == PieceType.BISHOP:
-                        table = self.piece_tables["bishop"]
-                    elif piece.piece_type == PieceType.ROOK:
-                        table = self.piece_tables["rook"]
-                    elif piece.piece_type == PieceType.QUEEN:
-                        table = self.piece_tables["queen"]
-                    elif piece.piece_type == PieceType.KING:
-                        table = self.piece_tables["king_end"] if is_endgame else self.piece_tables["king_middle"]
-                    else:
-                        continue
-                    
-                    # Get position value
-                    if piece.color == Color.WHITE:
-                        position_value = table[rank][file]
-                        white_score += position_value
-                    else:
-                        # Flip board for black pieces
-                        position_value = table[7 - rank][file]
-                        black_score += position_value
+        score = 0
+        for code, bitboard in enumerate(bitboards):
+            table = tables[code]
+            while bitboard:
+                square = (bitboard & -bitboard).bit_length() - 1
+                score += table[square]
+                bitboard &= bitboard - 1
         
-        return white_score - black_score
+        return score
+    
+    def _evaluate_mobility(self, board):
+        """Count the pseudo-legal moves of the side to move from attack bitboards"""
+        side = 0 if board.active_color == Color.WHITE else 1
+        bitboards = board.bitboards
+        base = side * 6
+        own, enemies = board.occupancy[side], board.occupancy[side ^ 1]
+        occupied = own | enemies
+        empty = ~occupied & 0xFFFFFFFFFFFFFFFF
+        
+        # Pawn pushes (double pushes from the starting rank) and captures
+        pawns = bitboards[base]
+        if side == 0:
+            single = (pawns >> 8) & empty
+            double = ((single & 0xFF0000000000) >> 8) & empty
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & 0xFF0000) << 8) & empty
+        count = single.bit_count() + double.bit_count()
+        pawn_attacks = PAWN_ATTACKS[side]
+        while pawns:
+            square = (pawns & -pawns).bit_length() - 1
+            pawns &= pawns - 1
+            count += (pawn_attacks[square] & enemies).bit_count()
+        
+        # Pieces: every attacked square not holding an own piece; queens are both
+        # diagonal and straight sliders
+        movable = ~own
+        knights = bitboards[base + 1]
+        while knights:
+            square = (knights & -knights).bit_length() - 1
+            knights &= knights - 1
+            count += (KNIGHT_ATTACKS[square] & movable).bit_count()
+        
+        queens = bitboards[base + 4]
+        diagonal = bitboards[base + 2] | queens
+        while diagonal:
+            square = (diagonal & -diagonal).bit_length() - 1
+            diagonal &= diagonal - 1
+            count += (bishop_attacks(square, occupied) & movable).bit_count()
+        
+        straight = bitboards[base + 3] | queens
+        while straight:
+            square = (straight & -straight).bit_length() - 1
+            straight &= straight - 1
+            count += (rook_attacks(square, occupied) & movable).bit_count()
+        
+        king = bitboards[base + 5]
+        if king:
+            count += (KING_ATTACKS[king.bit_length() - 1] & movable).bit_count()
+        
+        return count
     
     def _evaluate_pawn_structure(self, board):
         """Evaluate pawn structure (doubled, isolated, passed pawns)"""
@@ -301,58 +357,30 @@ class Evaluator:
         
         return white_score - black_score
     
-    def _evaluate_king_safety(self, board):
+    def _evaluate_king_safety(self, board, king_squares=None):
         """Evaluate king safety"""
         white_score = 0
         black_score = 0
         
         # Find kings
-        white_king_pos = self._find_king(board, Color.WHITE)
-        black_king_pos = self._find_king(board, Color.BLACK)
+        white_king_sq, black_king_sq = king_squares or board.king_squares
         
-        if white_king_pos:
+        if white_king_sq >= 0:
             # Count defenders around white king
-            white_defenders = self._count_defenders(board, white_king_pos, Color.WHITE)
+            white_defenders = (KING_ATTACKS[white_king_sq] & board.occupancy[0]).bit_count()
             white_score += white_defenders * 5
             
             # Penalize exposed king
-            white_king_rank, white_king_file = white_king_pos
-            if white_king_rank < 6:  # King has moved away from back rank
+            if white_king_sq >> 3 < 6:  # King has moved away from back rank
                 white_score -= 20
         
-        if black_king_pos:
+        if black_king_sq >= 0:
             # Count defenders around black king
-            black_defenders = self._count_defenders(board, black_king_pos, Color.BLACK)
+            black_defenders = (KING_ATTACKS[black_king_sq] & board.occupancy[1]).bit_count()
             black_score += black_defenders * 5
             
             # Penalize exposed king
-            black_king_rank, black_king_file = black_king_pos
-            if black_king_rank > 1:  # King has moved away from back rank
+            if black_king_sq >> 3 > 1:  # King has moved away from back rank
                 black_score -= 20
         
         return white_score - black_score
-    
-    def _find_king(self, board, color):
-        """Find the position of a king"""
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece and piece.piece_type == PieceType.KING and piece.color == color:
-                    return (rank, file)
-        return None
-    
-    def _count_defenders(self, board, position, color):
-        """Count friendly pieces defending the area around a position"""
-        rank, file = position
-        defenders = 0
-        
-        for r in range(max(0, rank - 1), min(8, rank + 2)):
-            for f in range(max(0, file - 1), min(8, file + 2)):
-                if r == rank and f == file:
-                    continue  # Skip the position itself
-                
-                piece = board.get_piece_at(r, f)
-                if piece and piece.color == color:
-                    defenders += 1
-        
-        return defenders
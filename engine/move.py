@@ -1,221 +1,496 @@
+from array import array
 from Chess_Engine_in_python.engine.board import PieceType, Color
+from Chess_Engine_in_python.utils.bitboard import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN
+from Chess_Engine_in_python.utils.magic import rook_attacks, bishop_attacks, queen_attacks
+
+# A move is packed into 16 bits: from square (bits 0-5), to square (bits 6-11)
+# and a 4-bit flag (bits 12-15). Squares are rank * 8 + file, 0 = a8, 63 = h1.
+QUIET = 0
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EN_PASSANT = 5
+PROMOTION = 8          # Promotion flags are PROMOTION + index into PROMOTION_TYPES,
+PROMOTION_CAPTURE = 12  # plus CAPTURE for capturing promotions
+
+PROMOTION_TYPES = [PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN]
+
+def encode_move(from_sq, to_sq, flags=QUIET):
+    """Pack a move into its 16-bit integer code"""
+    return from_sq | (to_sq << 6) | (flags << 12)
 
 class Move:
+    """Thin wrapper around a 16-bit move code (see encode_move)"""
+    __slots__ = ('code',)
+    
     def __init__(self, from_square, to_square, is_capture=False, is_castling=False, 
                  is_en_passant=False, promotion_piece=None):
-        self.from_square = from_square  # (rank, file) tuple
-        self.to_square = to_square      # (rank, file) tuple
-        self.is_capture = is_capture
-        self.is_castling = is_castling
-        self.is_en_passant = is_en_passant
-        self.promotion_piece = promotion_piece  # PieceType or None
+        from_sq = from_square[0] * 8 + from_square[1]  # (rank, file) tuples
+        to_sq = to_square[0] * 8 + to_square[1]
+        
+        if is_castling:
+            flags = KING_CASTLE if to_sq > from_sq else QUEEN_CASTLE
+        elif is_en_passant:
+            flags = EN_PASSANT
+        else:
+            flags = CAPTURE if is_capture else QUIET
+            if promotion_piece:
+                flags |= PROMOTION | PROMOTION_TYPES.index(promotion_piece)
+        
+        self.code = encode_move(from_sq, to_sq, flags)
+    
+    @classmethod
+    def from_code(cls, code):
+        """Wrap an existing move code without re-encoding it"""
+        move = object.__new__(cls)
+        move.code = code
+        return move
+    
+    @property
+    def from_index(self):
+        """From square as an index (0-63)"""
+        return self.code & 63
+    
+    @property
+    def to_index(self):
+        """To square as an index (0-63)"""
+        return (self.code >> 6) & 63
+    
+    @property
+    def flags(self):
+        return self.code >> 12
+    
+    @property
+    def from_square(self):
+        """From square as a (rank, file) tuple"""
+        return divmod(self.code & 63, 8)
+    
+    @property
+    def to_square(self):
+        """To square as a (rank, file) tuple"""
+        return divmod((self.code >> 6) & 63, 8)
+    
+    @property
+    def is_capture(self):
+        return bool(self.code & (CAPTURE << 12))
+    
+    @property
+    def is_castling(self):
+        return (self.code >> 12) in (KING_CASTLE, QUEEN_CASTLE)
+    
+    @property
+    def is_en_passant(self):
+        return (self.code >> 12) == EN_PASSANT
+    
+    @property
+    def promotion_piece(self):
+        """PieceType promoted to, or None"""
+        if self.code & (PROMOTION << 12):
+            return PROMOTION_TYPES[(self.code >> 12) & 3]
+        return None
+    
+    @promotion_piece.setter
+    def promotion_piece(self, piece_type):
+        flags = (self.code >> 12) & CAPTURE
+        if piece_type:
+            flags |= PROMOTION | PROMOTION_TYPES.index(piece_type)
+        self.code = (self.code & 0xFFF) | (flags << 12)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Move):
+            return NotImplemented
+        return self.code == other.code
+    
+    def __hash__(self):
+        return self.code
+    
+    def __repr__(self):
+        return f"Move({self})"
     
     def __str__(self):
         """Convert move to algebraic notation"""
         files = 'abcdefgh'
         ranks = '87654321'
         
-        from_file, from_rank = files[self.from_square[1]], ranks[self.from_square[0]]
-        to_file, to_rank = files[self.to_square[1]], ranks[self.to_square[0]]
+        from_sq, to_sq = self.code & 63, (self.code >> 6) & 63
+        move_str = f"{files[from_sq & 7]}{ranks[from_sq >> 3]}{files[to_sq & 7]}{ranks[to_sq >> 3]}"
         
-        move_str = f"{from_file}{from_rank}{to_file}{to_rank}"
-        
-        if self.promotion_piece:
-            promotion_symbols = {
-                PieceType.KNIGHT: 'n',
-                PieceType.BISHOP: 'b',
-                PieceType.ROOK: 'r',
-                PieceType.QUEEN: 'q'
-            }
-            move_str += promotion_symbols.get(self.promotion_piece, '')
+        if self.code & (PROMOTION << 12):
+            move_str += 'nbrq'[(self.code >> 12) & 3]
         
         return move_str
 
+def pack_moves(moves):
+    """Store a list of moves compactly as an array('H') of move codes"""
+    return array('H', [move.code for move in moves])
+
+def unpack_moves(codes):
+    """Rebuild Move objects from an iterable of move codes"""
+    from_code = Move.from_code
+    return [from_code(code) for code in codes]
+
+# Generation stages: captures (including promotions and en passant) and quiet moves
+CAPTURES = 1
+QUIETS = 2
+ALL_MOVES = CAPTURES | QUIETS
+
+# Every square; the check mask when not in check and the pin ray of an unpinned piece
+ALL_SQUARES = 0xFFFFFFFFFFFFFFFF
+
 class MoveGenerator:
-    def __init__(self, board):
+    def __init__(self, board, cache=None):
         self.board = board
+        # Optional MoveCache (engine.move_cache) shared between generators
+        self.cache = cache
+        self._check_info = None
+        self._pins = {}
+    
+    def reset(self, board):
+        """Point the generator at another position, keeping its buffers"""
+        self.board = board
+        self._check_info = None
     
     def generate_legal_moves(self):
         """Generate all legal moves for the active color"""
-        legal_moves = []
-        
-        for rank in range(8):
-            for file in range(8):
-                piece = self.board.get_piece_at(rank, file)
-                
-                if piece and piece.color == self.board.active_color:
-                    # Generate moves for this piece
-                    piece_moves = self._generate_piece_moves(rank, file, piece)
-                    legal_moves.extend(piece_moves)
-        
-        return legal_moves
-    
-    def _generate_piece_moves(self, rank, file, piece):
-        """Generate all possible moves for a specific piece"""
-        if piece.piece_type == PieceType.PAWN:
-            return self._generate_pawn_moves(rank, file, piece.color)
-        elif piece.piece_type == PieceType.KNIGHT:
-            return self._generate_knight_moves(rank, file, piece.color)
-        elif piece.piece_type == PieceType.BISHOP:
-            return self._generate_bishop_moves(rank, file, piece.color)
-        elif piece.piece_type == PieceType.ROOK:
-            return self._generate_rook_moves(rank, file, piece.color)
-        elif piece.piece_type == PieceType.QUEEN:
-            return self._generate_queen_moves(rank, file, piece.color)
-        elif piece.piece_type == PieceType.KING:
-            return self._generate_king_moves(rank, file, piece.color)
-        
-        return []
-    
-    def _generate_pawn_moves(self, rank, file, color):
-        """Generate all possible pawn moves"""
-        moves = []
-        direction = -1 if color == Color.WHITE else 1
-        
-        # Single push
-        new_rank = rank + direction
-        if 0 <= new_rank < 8 and not self.board.get_piece_at(new_rank, file):
-            # Check for promotion
-            if new_rank == 0 or new_rank == 7:
-                for promotion_piece in [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]:
-                    moves.append(Move((rank, file), (new_rank, file), promotion_piece=promotion_piece))
-            else:
-                moves.append(Move((rank, file), (new_rank, file)))
-            
-            # Double push from starting position
-            if (color == Color.WHITE and rank == 6) or (color == Color.BLACK and rank == 1):
-                new_rank = rank + 2 * direction
-                if 0 <= new_rank < 8 and not self.board.get_piece_at(new_rank, file) and not self.board.get_piece_at(rank + direction, file):
-                    moves.append(Move((rank, file), (new_rank, file)))
+        cache = self.cache
+        if cache is None:
+            return self._generate(ALL_MOVES)
         
-        # Captures
-        for file_offset in [-1, 1]:
-            new_file = file + file_offset
-            if 0 <= new_file < 8:
-                # Regular capture
-                new_rank = rank + direction
-                if 0 <= new_rank < 8:
-                    target_piece = self.board.get_piece_at(new_rank, new_file)
-                    if target_piece and target_piece.color != color:
-                        # Check for promotion
-                        if new_rank == 0 or new_rank == 7:
-                            for promotion_piece in [PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT]:
-                                moves.append(Move((rank, file), (new_rank, new_file), is_capture=True, promotion_piece=promotion_piece))
-                        else:
-                            moves.append(Move((rank, file), (new_rank, new_file), is_capture=True))
-                
-                # En passant capture
-                if self.board.en_passant_target:
-                    ep_rank, ep_file = self.board.en_passant_target
-                    if ep_rank == rank + direction and ep_file == new_file:
-                        moves.append(Move((rank, file), (ep_rank, ep_file), is_capture=True, is_en_passant=True))
+        moves = cache.get(self.board)
+        if moves is None:
+            moves = self._generate(ALL_MOVES)
+            cache.store(self.board, moves)
+        return moves
+    
+    def generate_captures(self, moves=None):
+        """Generate the legal captures, en passant captures and promotions for the
+        active color, appended to moves if given"""
+        return self._generate(CAPTURES, moves=moves)
+    
+    def generate_evasions(self, moves=None):
+        """Generate the legal moves out of check: king moves, captures of the
+        checker and interpositions (all legal moves when not in check), appended
+        to moves if given"""
+        side, king_sq, checkers, check_mask, pins = self._legal_state()
+        if not checkers:
+            return self._generate(ALL_MOVES, moves=moves)
+        
+        if moves is None:
+            moves = []
+        board = self.board
+        from_code = Move.from_code
+        own_pawns = board.bitboards[side * 6]
+        enemies = board.occupancy[side ^ 1]
+        occupied = board.occupancy[side] | enemies
+        king_bit = 1 << king_sq
+        step = -8 if side == 0 else 8
+        promotion_rank = 0 if side == 0 else 7   # Rank index a pawn promotes on
+        double_rank = 4 if side == 0 else 3      # Rank index a double push lands on
+        
+        # Single check: only the checker's square and the squares between it and
+        # the king resolve it, so look up which of our pieces reach each of them
+        targets = check_mask
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            to_sq = bit.bit_length() - 1
+            capture = enemies & bit
+            movers = board.attackers_to(to_sq, side) & ~king_bit
+            if not capture:
+                # Pawns reach an empty square by pushing, not along their attacks
+                movers &= ~own_pawns
+                from_sq = to_sq - step
+                if 0 <= from_sq < 64 and own_pawns >> from_sq & 1:
+                    movers |= 1 << from_sq
+                elif (to_sq >> 3 == double_rank and not occupied >> from_sq & 1
+                        and own_pawns >> (from_sq - step) & 1):
+                    movers |= 1 << (from_sq - step)
+            flags = CAPTURE if capture else QUIET
+            while movers:
+                from_sq = (movers & -movers).bit_length() - 1
+                movers &= movers - 1
+                if not pins.get(from_sq, ALL_SQUARES) & bit:
+                    continue
+                if own_pawns >> from_sq & 1 and to_sq >> 3 == promotion_rank:
+                    for index in (3, 2, 1, 0):  # Queen, rook, bishop, knight
+                        moves.append(from_code(encode_move(from_sq, to_sq, flags | PROMOTION | index)))
+                else:
+                    moves.append(from_code(encode_move(from_sq, to_sq, flags)))
+        
+        # En passant removes a checking pawn without landing on its square
+        ep_sq = board.ep_square
+        if ep_sq >= 0 and checkers == 1 << (ep_sq - step):
+            candidates = PAWN_ATTACKS[side ^ 1][ep_sq] & own_pawns
+            while candidates:
+                from_sq = (candidates & -candidates).bit_length() - 1
+                candidates &= candidates - 1
+                code = encode_move(from_sq, ep_sq, EN_PASSANT)
+                if self._is_en_passant_legal(code, side, king_sq):
+                    moves.append(from_code(code))
         
+        # King steps, the only evasions in double check
+        self._add_king_moves(moves, king_sq, side, KING_ATTACKS[king_sq] & ~board.occupancy[side])
         return moves
     
-    def _generate_knight_moves(self, rank, file, color):
-        """Generate all possible knight moves"""
-        moves = []
-        offsets = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
+    def has_legal_move(self):
+        """Check whether the active color has any legal move, stopping at the first one found"""
+        board = self.board
+        side, king_sq, checkers, check_mask, pins = self._legal_state()
+        
+        # King moves first: they are few and the only option in double check
+        if king_sq >= 0 and self._generate(ALL_MOVES, (king_sq,)):
+            return True
+        if not check_mask:
+            return False
+        
+        # Then the other pieces, cheapest first: pawns, knights, bishops, rooks, queens
+        base = side * 6
+        for bitboard in board.bitboards[base:base + 5]:
+            while bitboard:
+                square = (bitboard & -bitboard).bit_length() - 1
+                bitboard &= bitboard - 1
+                if self._generate(ALL_MOVES, (square,)):
+                    return True
+        return False
+    
+    def is_check(self):
+        """Check if the active color's king is attacked"""
+        return bool(self._legal_state()[2])
+    
+    def is_checkmate(self):
+        """Check if the active color is in check with no legal move"""
+        return self.is_check() and not self.has_legal_move()
+    
+    def is_stalemate(self):
+        """Check if the active color is not in check but has no legal move"""
+        return not self.is_check() and not self.has_legal_move()
+    
+    def _legal_state(self):
+        """Checkers, check-block mask and pin rays for the active color, computed once per position"""
+        if self._check_info is not None:
+            return self._check_info
+        
+        board = self.board
+        bitboards = board.bitboards
+        side = 0 if board.active_color == Color.WHITE else 1
+        king_sq = board.king_squares[side]
+        checkers, check_mask = 0, ALL_SQUARES
+        pins = self._pins
+        pins.clear()
+        
+        if king_sq >= 0:
+            own, enemies = board.occupancy[side], board.occupancy[side ^ 1]
+            # With tracked attack maps an unattacked king needs no checker lookup
+            attack_maps = board.attack_maps
+            if attack_maps is None or attack_maps[side ^ 1] >> king_sq & 1:
+                checkers = board.attackers_to(king_sq, side ^ 1)
+            if checkers & (checkers - 1):
+                # Double check: only the king can move
+                check_mask = 0
+            elif checkers:
+                # Capture the checker or block the line between it and the king
+                check_mask = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+            
+            # Enemy sliders on a line with the king with exactly one of our pieces between
+            base = (side ^ 1) * 6
+            queens = bitboards[base + 4]
+            snipers = ((rook_attacks(king_sq, enemies) & (bitboards[base + 3] | queens))
+                       | (bishop_attacks(king_sq, enemies) & (bitboards[base + 2] | queens)))
+            while snipers:
+                sniper = (snipers & -snipers).bit_length() - 1
+                snipers &= snipers - 1
+                between = BETWEEN[king_sq][sniper]
+                blockers = between & (own | enemies)
+                if blockers and not blockers & (blockers - 1) and blockers & own:
+                    # The pinned piece may only move along the pin, capturing the pinner included
+                    pins[blockers.bit_length() - 1] = between | (1 << sniper)
         
-        for rank_offset, file_offset in offsets:
-            new_rank, new_file = rank + rank_offset, file + file_offset
+        self._check_info = (side, king_sq, checkers, check_mask, pins)
+        return self._check_info
+    
+    def _generate(self, stage, squares=None, moves=None):
+        """Generate the legal moves of the given stage(s) for the active color,
+        optionally only for the pieces on the given squares, appended to moves
+        if given"""
+        if moves is None:
+            moves = []
+        board = self.board
+        mailbox = board.mailbox
+        color = board.active_color
+        side, king_sq, checkers, check_mask, pins = self._legal_state()
+        occupied = board.occupancy[0] | board.occupancy[1]
+        
+        # Squares non-pawn pieces may move to in this stage
+        if stage == ALL_MOVES:
+            targets = ~board.occupancy[side]
+        elif stage == CAPTURES:
+            targets = board.occupancy[side ^ 1]
+        else:
+            targets = ~occupied
+        
+        for square in (board.piece_squares(color) if squares is None else squares):
+            piece_type = mailbox[square].piece_type
+            if piece_type is PieceType.KING:
+                self._add_king_moves(moves, square, side, KING_ATTACKS[square] & targets)
+                if stage & QUIETS and not checkers:
+                    self._add_castling_moves(moves, square >> 3, square & 7, color)
+                continue
             
-            if 0 <= new_rank < 8 and 0 <= new_file < 8:
-                target_piece = self.board.get_piece_at(new_rank, new_file)
-                
-                if not target_piece:
-                    # Empty square
-                    moves.append(Move((rank, file), (new_rank, new_file)))
-                elif target_piece.color != color:
-                    # Capture
-                    moves.append(Move((rank, file), (new_rank, new_file), is_capture=True))
+            # Non-king moves must resolve any check and stay on their pin ray
+            allowed = check_mask & pins.get(square, ALL_SQUARES)
+            if not allowed:
+                continue
+            if piece_type is PieceType.PAWN:
+                for move in self._generate_pawn_moves(square >> 3, square & 7, color, stage):
+                    code = move.code
+                    if code >> 12 == EN_PASSANT:
+                        if self._is_en_passant_legal(code, side, king_sq):
+                            moves.append(move)
+                    elif allowed >> ((code >> 6) & 63) & 1:
+                        moves.append(move)
+            elif piece_type is PieceType.KNIGHT:
+                self._add_target_moves(moves, square, side, KNIGHT_ATTACKS[square] & targets & allowed)
+            elif piece_type is PieceType.BISHOP:
+                self._add_target_moves(moves, square, side, bishop_attacks(square, occupied) & targets & allowed)
+            elif piece_type is PieceType.ROOK:
+                self._add_target_moves(moves, square, side, rook_attacks(square, occupied) & targets & allowed)
+            else:
+                self._add_target_moves(moves, square, side, queen_attacks(square, occupied) & targets & allowed)
         
         return moves
     
-    def _generate_sliding_moves(self, rank, file, color, directions):
-        """Generate sliding moves (bishop, rook, queen)"""
+    def _add_king_moves(self, moves, square, side, targets):
+        """Append king steps to target squares the enemy does not attack"""
+        board = self.board
+        # Look through the king so it cannot step back along a slider's line
+        occupied = (board.occupancy[0] | board.occupancy[1]) ^ (1 << square)
+        safe = 0
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            if not board.attackers_to(bit.bit_length() - 1, side ^ 1, occupied):
+                safe |= bit
+        self._add_target_moves(moves, square, side, safe)
+    
+    def _is_en_passant_legal(self, code, side, king_sq):
+        """Check that an en passant capture does not leave the king attacked"""
+        if king_sq < 0:
+            return True
+        board = self.board
+        from_sq, to_sq = code & 63, (code >> 6) & 63
+        captured = 1 << ((from_sq & ~7) | (to_sq & 7))
+        # Both pawns leave their squares at once, which can uncover a slider along the rank
+        occupied = (board.occupancy[0] | board.occupancy[1]) ^ (1 << from_sq) ^ captured | (1 << to_sq)
+        return not board.attackers_to(king_sq, side ^ 1, occupied) & ~captured
+    
+    def _generate_pawn_moves(self, rank, file, color, stage=ALL_MOVES):
+        """Generate all possible pawn moves (promotions count as captures for staging)"""
         moves = []
+        from_code = Move.from_code
+        side = 0 if color == Color.WHITE else 1
+        from_sq = rank * 8 + file
+        occupied = self.board.occupancy[0] | self.board.occupancy[1]
+        step = -8 if side == 0 else 8
+        promotion_rank = 1 if side == 0 else 6   # Rank index a push from here promotes
+        start_rank = 6 if side == 0 else 1
         
-        for rank_dir, file_dir in directions:
-            for distance in range(1, 8):
-                new_rank = rank + rank_dir * distance
-                new_file = file + file_dir * distance
-                
-                if not (0 <= new_rank < 8 and 0 <= new_file < 8):
-                    # Out of bounds
-                    break
-                
-                target_piece = self.board.get_piece_at(new_rank, new_file)
-                
-                if not target_piece:
-                    # Empty square
-                    moves.append(Move((rank, file), (new_rank, new_file)))
-                elif target_piece.color != color:
-                    # Capture
-                    moves.append(Move((rank, file), (new_rank, new_file), is_capture=True))
-                    break
-                else:
-                    # Blocked by own piece
-                    break
+        # Single push, and double push from the starting rank
+        to_sq = from_sq + step
+        if not occupied >> to_sq & 1:
+            if rank == promotion_rank:
+                if stage & CAPTURES:
+                    for index in (3, 2, 1, 0):  # Queen, rook, bishop, knight
+                        moves.append(from_code(encode_move(from_sq, to_sq, PROMOTION | index)))
+            elif stage & QUIETS:
+                moves.append(from_code(encode_move(from_sq, to_sq)))
+                if rank == start_rank and not occupied >> (to_sq + step) & 1:
+                    moves.append(from_code(encode_move(from_sq, to_sq + step)))
         
+        if not stage & CAPTURES:
+            return moves
+        
+        # Captures
+        attacks = PAWN_ATTACKS[side][from_sq]
+        targets = attacks & self.board.occupancy[side ^ 1]
+        while targets:
+            to_sq = (targets & -targets).bit_length() - 1
+            targets &= targets - 1
+            if rank == promotion_rank:
+                for index in (3, 2, 1, 0):
+                    moves.append(from_code(encode_move(from_sq, to_sq, PROMOTION_CAPTURE | index)))
+            else:
+                moves.append(from_code(encode_move(from_sq, to_sq, CAPTURE)))
+        
+        # En passant capture
+        ep_sq = self.board.ep_square
+        if ep_sq >= 0:
+            if attacks >> ep_sq & 1:
+                moves.append(from_code(encode_move(from_sq, ep_sq, EN_PASSANT)))
+        
+        return moves
+    
+    def _add_target_moves(self, moves, from_sq, side, targets):
+        """Append moves from a square to each square of a target bitboard (own pieces already excluded)"""
+        from_code = Move.from_code
+        enemies = self.board.occupancy[side ^ 1]
+        while targets:
+            to_sq = (targets & -targets).bit_length() - 1
+            targets &= targets - 1
+            flags = CAPTURE if enemies >> to_sq & 1 else QUIET
+            moves.append(from_code(from_sq | (to_sq << 6) | (flags << 12)))
+    
+    def _generate_target_moves(self, from_sq, color, attacks):
+        """Generate quiet moves and captures from a square to the squares in an attack bitboard"""
+        moves = []
+        side = 0 if color == Color.WHITE else 1
+        # Own pieces block, enemy pieces are captured
+        self._add_target_moves(moves, from_sq, side, attacks & ~self.board.occupancy[side])
         return moves
     
+    def _generate_knight_moves(self, rank, file, color):
+        """Generate all possible knight moves"""
+        from_sq = rank * 8 + file
+        return self._generate_target_moves(from_sq, color, KNIGHT_ATTACKS[from_sq])
+    
     def _generate_bishop_moves(self, rank, file, color):
         """Generate all possible bishop moves"""
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]  # Diagonals
-        return self._generate_sliding_moves(rank, file, color, directions)
+        from_sq = rank * 8 + file
+        return self._generate_target_moves(from_sq, color, bishop_attacks(from_sq, self.board.occupied))
     
     def _generate_rook_moves(self, rank, file, color):
         """Generate all possible rook moves"""
-        directions = [(-1, 0), (0, -1), (0, 1), (1, 0)]  # Horizontals and verticals
-        return self._generate_sliding_moves(rank, file, color, directions)
+        from_sq = rank * 8 + file
+        return self._generate_target_moves(from_sq, color, rook_attacks(from_sq, self.board.occupied))
     
     def _generate_queen_moves(self, rank, file, color):
         """Generate all possible queen moves"""
-        directions = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1), (0, 1),
-            (1, -1), (1, 0), (1, 1)
-        ]  # All directions
-        return self._generate_sliding_moves(rank, file, color, directions)
+        from_sq = rank * 8 + file
+        return self._generate_target_moves(from_sq, color, queen_attacks(from_sq, self.board.occupied))
     
     def _generate_king_moves(self, rank, file, color):
         """Generate all possible king moves"""
-        moves = []
+        from_sq = rank * 8 + file
         
         # Regular king moves
-        directions = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1), (0, 1),
-            (1, -1), (1, 0), (1, 1)
-        ]
-        
-        for rank_dir, file_dir in directions:
-            new_rank, new_file = rank + rank_dir, file + file_dir
-            
-            if 0 <= new_rank < 8 and 0 <= new_file < 8:
-                target_piece = self.board.get_piece_at(new_rank, new_file)
-                
-                if not target_piece:
-                    # Empty square
-                    moves.append(Move((rank, file), (new_rank, new_file)))
-                elif target_piece.color != color:
-                    # Capture
-                    moves.append(Move((rank, file), (new_rank, new_file), is_capture=True))
+        moves = self._generate_target_moves(from_sq, color, KING_ATTACKS[from_sq])
         
         # Castling
-        if self.board.castling_rights[color]['kingside']:
+        self._add_castling_moves(moves, rank, file, color)
+        
+        return moves
+    
+    def _add_castling_moves(self, moves, rank, file, color):
+        """Append the castling moves available to the king on (rank, file)"""
+        from_sq = rank * 8 + file
+        rights = self.board.castling >> (0 if color == Color.WHITE else 2)
+        
+        if rights & 1:
             if self._can_castle_kingside(rank, file, color):
-                moves.append(Move((rank, file), (rank, file + 2), is_castling=True))
+                moves.append(Move.from_code(encode_move(from_sq, from_sq + 2, KING_CASTLE)))
         
-        if self.board.castling_rights[color]['queenside']:
+        if rights & 2:
             if self._can_castle_queenside(rank, file, color):
-                moves.append(Move((rank, file), (rank, file - 2), is_castling=True))
-        
-        return moves
+                moves.append(Move.from_code(encode_move(from_sq, from_sq - 2, QUEEN_CASTLE)))
     
     def _can_castle_kingside(self, rank, file, color):
         """Check if kingside castling is possible"""
@@ -246,6 +521,197 @@ class MoveGenerator:
         return True
     
     def is_move_legal(self, move):
-        """Check if a move is legal"""
-        # Implementation will be added
-        pass
+        """Check if a move is legal in the current position"""
+        from_sq = move.code & 63
+        piece = self.board.mailbox[from_sq]
+        if not piece or piece.color != self.board.active_color:
+            return False
+        return move in self._generate(ALL_MOVES, (from_sq,))
+
+class NodeContext:
+    """Facts about one search node (legal moves, check state, king squares,
+    checkers and pins) computed once and shared by move ordering and evaluation"""
+    __slots__ = ('board', 'generator', 'side', 'king_squares', 'checkers',
+                 'check_mask', 'pins', 'in_check', '_moves')
+    
+    def __init__(self, board):
+        self.generator = MoveGenerator(board)
+        self.reset(board)
+    
+    def reset(self, board):
+        """Compute the context of another position, reusing the generator and its buffers"""
+        self.board = board
+        self.generator.reset(board)
+        side, king_sq, checkers, check_mask, pins = self.generator._legal_state()
+        self.side = side
+        self.king_squares = tuple(board.king_squares)
+        self.checkers = checkers
+        self.check_mask = check_mask
+        self.pins = pins
+        self.in_check = bool(checkers)
+        self._moves = None
+    
+    @property
+    def moves(self):
+        """All legal moves, generated on first use"""
+        if self._moves is None:
+            self._moves = self.generator.generate_legal_moves()
+        return self._moves
+    
+    def has_legal_move(self):
+        """Check for a legal move without generating them all unless already done"""
+        if self._moves is not None:
+            return bool(self._moves)
+        return self.generator.has_legal_move()
+
+# Capture ordering values indexed by piece code (white P N B R Q K, then black)
+_ORDER_VALUES = [100, 320, 330, 500, 900, 20000] * 2
+
+def static_exchange(board, move):
+    """Material (in centipawns) a capture wins once every recapture on its square
+    is played out, each side recapturing with its least valuable attacker and
+    free to stop when recapturing would lose material. Pins are ignored."""
+    code = move.code
+    from_sq = code & 63
+    to_sq = (code >> 6) & 63
+    flags = code >> 12
+    mailbox = board.mailbox
+    bitboards = board.bitboards
+    attacker = mailbox[from_sq]
+    occupied = (board.occupancy[0] | board.occupancy[1]) ^ (1 << from_sq)
+    
+    # What the first capture wins and the value of the piece left on the square
+    if flags == EN_PASSANT:
+        gains = [_ORDER_VALUES[0]]
+        occupied ^= 1 << ((from_sq & ~7) | (to_sq & 7))
+    else:
+        victim = mailbox[to_sq]
+        gains = [_ORDER_VALUES[victim.code] if victim else 0]
+    on_square = _ORDER_VALUES[attacker.code]
+    if flags & PROMOTION:
+        on_square = _ORDER_VALUES[(flags & 3) + 1]
+        gains[0] += on_square - _ORDER_VALUES[0]
+    
+    # Play out the recaptures, cheapest attacker first; removing each attacker
+    # from the occupancy uncovers the sliders behind it
+    side = attacker.color_index ^ 1
+    while True:
+        attackers = board.attackers_to(to_sq, side, occupied) & occupied
+        if not attackers:
+            break
+        base = side * 6
+        for offset in range(6):
+            candidates = attackers & bitboards[base + offset]
+            if candidates:
+                break
+        # The king may only recapture an undefended piece
+        if offset == 5 and board.attackers_to(to_sq, side ^ 1, occupied) & occupied:
+            break
+        occupied ^= candidates & -candidates
+        gains.append(on_square - gains[-1])
+        on_square = _ORDER_VALUES[offset]
+        side ^= 1
+    
+    # Each side keeps the better of recapturing and standing pat
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+class MovePicker:
+    """Yields moves for one search node in stages: the hash move, then captures
+    and promotions ordered most valuable victim / least valuable attacker first,
+    then killer moves, then the remaining quiet moves. Each stage is generated
+    only when the previous one is exhausted, so a cutoff on an early move never
+    pays for generating the quiet moves. With captures_only (quiescence search)
+    the quiet stages are skipped unless the side to move is in check.
+    
+    order_quiets(board, quiets, buffers) orders the quiet moves in place. buffers
+    (e.g. a search's SearchPly) provides the moves, quiets and scores lists the
+    stages are generated and sorted into, so a node allocates no new lists."""
+    
+    def __init__(self, board, hash_move=None, killers=(), order_quiets=None, context=None,
+                 captures_only=False, buffers=None):
+        self.board = board
+        self.context = context or NodeContext(board)
+        self.generator = self.context.generator
+        self.hash_move = hash_move
+        self.killers = killers
+        self.order_quiets = order_quiets
+        self.captures_only = captures_only
+        self.buffers = buffers
+    
+    def __iter__(self):
+        generator = self.generator
+        hash_move = self.hash_move
+        
+        # Stage 1: hash move
+        if hash_move is not None:
+            if generator.is_move_legal(hash_move):
+                yield hash_move
+            else:
+                hash_move = None
+        
+        # Stage 2: captures and promotions, best first. In check every move is an
+        # evasion, generated in one pass and split into captures and quiet moves.
+        buffers = self.buffers
+        if buffers is not None:
+            captures, quiets, keys = buffers.moves, buffers.quiets, buffers.scores
+            captures.clear()
+            quiets.clear()
+            keys.clear()
+        else:
+            captures, quiets, keys = [], [], []
+        checkers = self.context.checkers
+        if checkers:
+            # Captures move out to their own list; the quiet moves are compacted
+            # in place, each written at or before the index being read
+            generator.generate_evasions(quiets)
+            count = 0
+            for move in quiets:
+                if move.code >> 12 & (CAPTURE | PROMOTION):
+                    captures.append(move)
+                else:
+                    quiets[count] = move
+                    count += 1
+            del quiets[count:]
+        else:
+            generator.generate_captures(captures)
+        if captures:
+            # Sort keys pack the negated score above the move's index, as in Search._order_moves
+            mailbox = self.board.mailbox
+            for index, move in enumerate(captures):
+                code = move.code
+                flags = code >> 12
+                victim = mailbox[(code >> 6) & 63]
+                if victim:
+                    score = _ORDER_VALUES[victim.code] * 10 - _ORDER_VALUES[mailbox[code & 63].code] // 100
+                else:
+                    score = 1000 if flags == EN_PASSANT else 0
+                if flags & PROMOTION:
+                    # Promotion index 0-3 maps to piece codes 1-4 (knight to queen)
+                    score += _ORDER_VALUES[(flags & 3) + 1] * 10
+                keys.append(-score << 8 | index)
+            keys.sort()
+            for key in keys:
+                move = captures[key & 0xFF]
+                if move != hash_move:
+                    yield move
+        if self.captures_only and not checkers:
+            return
+        
+        # Stage 3: killer moves (quiet moves that caused cutoffs at this ply elsewhere)
+        killers = []
+        for killer in self.killers:
+            if (killer is not None and killer != hash_move and not killer.code & (CAPTURE << 12)
+                    and not killer.code & (PROMOTION << 12) and generator.is_move_legal(killer)):
+                killers.append(killer)
+                yield killer
+        
+        # Stage 4: remaining quiet moves
+        if not checkers:
+            generator._generate(QUIETS, moves=quiets)
+        if self.order_quiets:
+            quiets = self.order_quiets(self.board, quiets, buffers)
+        for move in quiets:
+            if move != hash_move and move not in killers:
+                yield move
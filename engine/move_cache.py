@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from Chess_Engine_in_python.engine.move import pack_moves, unpack_moves
+
+class MoveCache:
+    """Bounded cache of legal move lists keyed by Zobrist key.
+    Moves are stored as packed 16-bit arrays and the least recently used
+    position is evicted when the cache is full."""
+    
+    def __init__(self, size=65536):
+        self.size = size
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def store(self, board, moves):
+        """Store the legal moves of a position"""
+        key = board.zobrist_key
+        self.table[key] = pack_moves(moves)
+        self.table.move_to_end(key)
+        
+        # Evict the least recently used position
+        if len(self.table) > self.size:
+            self.table.popitem(last=False)
+    
+    def get(self, board):
+        """Retrieve the legal moves of a position, or None if not cached"""
+        key = board.zobrist_key
+        packed = self.table.get(key)
+        if packed is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self.table.move_to_end(key)
+        return unpack_moves(packed)
+    
+    def clear(self):
+        """Remove all positions and reset the counters"""
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+    
+    def __len__(self):
+        return len(self.table)
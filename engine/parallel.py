@@ -0,0 +1,202 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from Chess_Engine_in_python.engine.board import Board, Color
+from Chess_Engine_in_python.engine.move import Move, MoveGenerator
+from Chess_Engine_in_python.engine.search import Search
+from Chess_Engine_in_python.engine.transposition import TranspositionTable
+
+# ---- Lazy SMP ----
+# Every worker searches the whole tree from the same root; they cooperate only
+# through the shared transposition table, whose XOR-checked entries need no locks
+
+# Shared memory block, table and stop event of a helper process, set by the pool initializer
+_worker_memory = None
+_worker_table = None
+_worker_stop = None
+
+def _init_smp_worker(name, hash_mb, stop_event):
+    """Prepare a helper process: attach the shared transposition table"""
+    global _worker_memory, _worker_table, _worker_stop
+    # Pool processes share the parent's resource tracker, which unlinks the block
+    # only when the parent does
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_table = TranspositionTable(hash_mb, _worker_memory.buf)
+    _worker_stop = stop_event
+
+def _smp_task(fen, worker_id, max_depth, time_limit, age, attack_tracking=False):
+    """Search a position as one helper, returning (depth, score, move code, PV codes, nodes)"""
+    _worker_table.age = age
+    search = Search(Board(fen), max_depth, table=_worker_table, attack_tracking=attack_tracking)
+    search.verbose = False
+    search.stop_event = _worker_stop
+    
+    # Odd helpers start a ply deeper, so the workers spread over two depths
+    # instead of all searching the same tree in step
+    best_move = search.iterative_deepening(time_limit, start_depth=1 + worker_id % 2, new_search=False)
+    return (search.completed_depth, search.best_score, best_move.code if best_move else 0,
+            [move.code for move in search.principal_variation()], search.total_nodes)
+
+class LazySMPSearch:
+    """Lazy SMP search: the calling process and workers - 1 helper processes
+    search the same position, sharing one transposition table in shared memory.
+    Has the iterative_deepening interface of Search."""
+    
+    def __init__(self, board, max_depth=4, workers=None, hash_mb=16):
+        self.board = board.copy()
+        self.max_depth = max_depth
+        self.workers = workers or os.cpu_count() or 1
+        self.hash_mb = hash_mb
+        self.verbose = True
+        self.completed_depth = 0
+        self.best_score = 0
+        self.total_nodes = 0
+        self.pv = []
+    
+    def iterative_deepening(self, time_limit):
+        """Search with every worker and return the best move of the deepest completed search"""
+        start_time = time.time()
+        memory = shared_memory.SharedMemory(create=True, size=TranspositionTable.table_bytes(self.hash_mb))
+        table = TranspositionTable(self.hash_mb, memory.buf)
+        table.new_search()
+        search = Search(self.board, self.max_depth, table=table)
+        search.verbose = self.verbose
+        try:
+            if self.workers > 1:
+                stop_event = multiprocessing.Event()
+                with ProcessPoolExecutor(self.workers - 1, initializer=_init_smp_worker,
+                                         initargs=(memory.name, self.hash_mb, stop_event)) as pool:
+                    fen = self.board.to_fen()
+                    tracking = self.board.attack_maps is not None
+                    helpers = [pool.submit(_smp_task, fen, worker_id, self.max_depth, time_limit, table.age,
+                                           tracking)
+                               for worker_id in range(1, self.workers)]
+                    best_move = search.iterative_deepening(time_limit, new_search=False)
+                    
+                    # The main search is done: stop the helpers and collect what they finished
+                    stop_event.set()
+                    results = [future.result() for future in helpers]
+            else:
+                best_move = search.iterative_deepening(time_limit, new_search=False)
+                results = []
+            
+            # The main search wins ties; a helper is only preferred when it got deeper
+            results.insert(0, (search.completed_depth, search.best_score, best_move.code if best_move else 0,
+                               [move.code for move in search.principal_variation()], search.total_nodes))
+            depth, score, move_code, pv, _ = max(results, key=lambda result: result[0])
+            self.completed_depth = depth
+            self.best_score = score
+            self.pv = [Move.from_code(code) for code in pv]
+            self.total_nodes = sum(result[4] for result in results)
+            # Read before the shared table is released below
+            hashfull = table.hashfull()
+        finally:
+            table.entries.release()
+            memory.close()
+            memory.unlink()
+        
+        if self.verbose:
+            elapsed = time.time() - start_time
+            print(f"Lazy SMP ({self.workers} workers): Depth {self.completed_depth}, Score {self.best_score}, "
+                  f"Nodes {self.total_nodes}, Hashfull {hashfull}, Time {elapsed:.2f}s, PV {' '.join(str(move) for move in self.pv)}")
+        return Move.from_code(move_code) if move_code else None
+
+# ---- Root splitting ----
+# Each root move is searched by a fresh Search in its own task, so the result
+# depends only on the position and depth, never on scheduling or worker count
+
+def _root_task(fen, code, depth, alpha, beta, hash_mb):
+    """Search the reply tree of one root move in a window, returning (score, nodes
+    including quiescence nodes)"""
+    search = Search(Board(fen), depth, hash_mb)
+    board = search.board
+    board.push(Move.from_code(code))
+    score, _ = search.alpha_beta(board, depth - 1, alpha, beta, board.active_color == Color.WHITE, 1)
+    return score, search.nodes_count + search.qnodes_count
+
+class RootSplitSearch:
+    """Deterministic parallel search: at each depth the previous best move is
+    searched first, then the other root moves in parallel with a null window
+    on its score, re-searching with an open window the moves that beat it.
+    Has the iterative_deepening interface of Search."""
+    
+    def __init__(self, board, max_depth=4, workers=None, hash_mb=4):
+        self.board = board.copy()
+        self.max_depth = max_depth
+        self.workers = workers or os.cpu_count() or 1
+        self.hash_mb = hash_mb
+        self.verbose = True
+        self.completed_depth = 0
+        self.best_score = 0
+        self.total_nodes = 0
+        self.root_moves = []  # (move, score, nodes) of the last completed depth, in search order
+    
+    def iterative_deepening(self, time_limit):
+        """Search depth by depth up to max_depth or the time limit and return the best move"""
+        start_time = time.time()
+        fen = self.board.to_fen()
+        moves = MoveGenerator(self.board).generate_legal_moves()
+        best_move = None
+        self.completed_depth = 0
+        self.total_nodes = 0
+        if not moves:
+            return None
+        
+        # Scores are from white's side: white looks for higher ones, black for lower
+        sign = 1 if self.board.active_color == Color.WHITE else -1
+        infinity = float('inf')
+        
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            for depth in range(1, self.max_depth + 1):
+                # The previous best move goes first, the others keep generation order
+                if best_move is not None:
+                    moves.remove(best_move)
+                    moves.insert(0, best_move)
+                
+                # Search the first move with an open window for a score to test the rest against
+                first, nodes = _root_task(fen, moves[0].code, depth, -infinity, infinity, self.hash_mb)
+                results = {moves[0]: (first, nodes)}
+                
+                # Null-window searches only tell whether a move beats the first one
+                null_window = (first, first + 1) if sign > 0 else (first - 1, first)
+                open_window = (first, infinity) if sign > 0 else (-infinity, first)
+                tasks = [(move, null_window) for move in moves[1:]]
+                while tasks:
+                    args = [(fen, move.code, depth, low, high, self.hash_mb) for move, (low, high) in tasks]
+                    if pool is None:
+                        scores = [_root_task(*task) for task in args]
+                    else:
+                        scores = [future.result() for future in [pool.submit(_root_task, *task) for task in args]]
+                    
+                    # Moves that beat the first one are searched again with the window open past it
+                    retry = []
+                    for (move, window), (score, nodes) in zip(tasks, scores):
+                        previous_nodes = results[move][1] if move in results else 0
+                        results[move] = (score, previous_nodes + nodes)
+                        if window == null_window and score * sign > first * sign:
+                            retry.append((move, open_window))
+                    tasks = retry
+                
+                # Best score wins, the earliest move in search order on ties
+                self.root_moves = [(move, results[move][0], results[move][1]) for move in moves]
+                best_move, score, _ = max(self.root_moves, key=lambda result: result[1] * sign)
+                self.completed_depth = depth
+                self.best_score = score
+                depth_nodes = sum(nodes for _, _, nodes in self.root_moves)
+                self.total_nodes += depth_nodes
+                
+                if self.verbose:
+                    elapsed = time.time() - start_time
+                    print(f"Depth {depth}: Best move {best_move}, Score {score}, Nodes {depth_nodes}, Time {elapsed:.2f}s")
+                
+                if time.time() - start_time >= time_limit * 0.8:
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        
+        return best_move
@@ -1,81 +1,187 @@
 
 
 import time
+from Chess_Engine_in_python.engine.board import Color, PieceType
 from Chess_Engine_in_python.engine.evaluation import Evaluator
-from Chess_Engine_in_python.engine.move import MoveGenerator
+from Chess_Engine_in_python.engine.move import (
+    Move, MoveGenerator, MovePicker, NodeContext, static_exchange, CAPTURE, PROMOTION, EN_PASSANT
+)
+from Chess_Engine_in_python.engine.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Deepest ply the search stack is preallocated for
+MAX_PLY = 64
+
+# Quiescence delta pruning: a capture is skipped when even winning the captured
+# piece plus this margin cannot lift the static score to the search window
+DELTA_MARGIN = 200
+
+# History scores are halved across the table once any of them passes this; kept
+# below the smallest capture score so quiet moves never outrank captures
+HISTORY_MAX = 1 << 13
+
+class SearchStopped(Exception):
+    """Raised inside a search when its stop event is set"""
+
+class SearchPly:
+    """Reusable per-ply storage, allocated once per search and indexed by ply"""
+    __slots__ = ('moves', 'quiets', 'scores', 'killers', 'context')
+    
+    def __init__(self):
+        self.moves = []        # Captures (and promotions) of the node at this ply
+        self.quiets = []       # Its quiet moves, ordered in place
+        self.scores = []       # Packed (score, move index) sort keys of the moves being ordered
+        self.killers = [None, None]  # Quiet moves that caused beta cutoffs at this ply
+        self.context = None    # NodeContext reused by every node at this ply
+    
+    def node_context(self, board):
+        """The ply's NodeContext, computed for the given position"""
+        context = self.context
+        if context is None:
+            context = self.context = NodeContext(board)
+        else:
+            context.reset(board)
+        return context
 
 class Search:
-    def __init__(self, board, max_depth=4):
-        self.board = board
+    def __init__(self, board, max_depth=4, hash_mb=16, table=None, attack_tracking=False):
+        # Search on a private copy: moves are made and unmade in place with push/pop
+        self.board = board.copy()
+        # Incrementally tracked attack maps spare unchecked nodes the checker lookup
+        # (a board that already tracks them keeps doing so)
+        if attack_tracking:
+            self.board.set_attack_tracking(True)
         self.max_depth = max_depth
         self.evaluator = Evaluator()
         self.nodes_count = 0
-        self.transposition_table = {}
-        
-    def iterative_deepening(self, time_limit):
+        # Quiescence nodes past the horizon; the horizon nodes themselves are in nodes_count
+        self.qnodes_count = 0
+        # Skip captures that lose material by static exchange in the quiescence search
+        self.use_see = True
+        # A table may be passed in to share it, e.g. between Lazy SMP workers
+        self.transposition_table = table if table is not None else TranspositionTable(hash_mb)
+        self.verbose = True
+        # Optional event (e.g. multiprocessing.Event) that aborts the search when set
+        self.stop_event = None
+        self.completed_depth = 0
+        self.best_score = 0
+        self.total_nodes = 0
+        self.total_qnodes = 0
+        self.stack = [SearchPly() for _ in range(MAX_PLY + 1)]
+        # Butterfly history: cutoff credit of each quiet move, indexed side * 4096 + from * 64 + to
+        self.history = [0] * (2 * 64 * 64)
+        # Bound once rather than per node; MovePicker calls it with (board, quiets, ply_state)
+        self._order_quiets = self._order_moves
+    
+    def iterative_deepening(self, time_limit, start_depth=1, new_search=True):
         """Perform iterative deepening search up to max_depth or time limit"""
         start_time = time.time()
         best_move = None
+        self.completed_depth = 0
+        self.total_nodes = 0
+        self.total_qnodes = 0
+        maximizing = self.board.active_color == Color.WHITE
+        if new_search:
+            self.transposition_table.new_search()
+        root_height = len(self.board._undo_stack)
         
-        for depth in range(1, self.max_depth + 1):
+        for depth in range(min(start_depth, self.max_depth), self.max_depth + 1):
+            # Age the history so the previous iterations count for less than this one
+            self._age_history()
             self.nodes_count = 0
-            score, move = self.alpha_beta(self.board, depth, float('-inf'), float('inf'), True)
+            self.qnodes_count = 0
+            try:
+                score, move = self.alpha_beta(self.board, depth, float('-inf'), float('inf'), maximizing)
+            except SearchStopped:
+                # Take back the moves the interrupted iteration left on the board
+                while len(self.board._undo_stack) > root_height:
+                    self.board.pop()
+                self.total_nodes += self.nodes_count
+                self.total_qnodes += self.qnodes_count
+                break
+            self.total_nodes += self.nodes_count
+            self.total_qnodes += self.qnodes_count
             
             if move:
                 best_move = move
+                self.completed_depth = depth
+                self.best_score = score
                 
                 # Print info about the search
-                move_str = f"{chr(move.from_square[1] + 97)}{8 - move.from_square[0]}{chr(move.to_square[1] + 97)}{8 - move.to_square[0]}"
-                elapsed = time.time() - start_time
-                print(f"Depth {depth}: Best move {move_str}, Score {score}, Nodes {self.nodes_count}, Time {elapsed:.2f}s")
+                if self.verbose:
+                    elapsed = time.time() - start_time
+                    print(f"Depth {depth}: Best move {move}, Score {score}, Nodes {self.nodes_count}, "
+                          f"QNodes {self.qnodes_count}, Hashfull {self.transposition_table.hashfull()}, "
+                          f"Time {elapsed:.2f}s")
             
             # Check if time limit reached - use a more aggressive cutoff
             if time.time() - start_time >= time_limit * 0.8:
                 break
-                
+        
         return best_move
     
-    def alpha_beta(self, board, depth, alpha, beta, maximizing_player):
+    def principal_variation(self, max_length=MAX_PLY):
+        """Line of best moves from the root, read back from the transposition table"""
+        board = self.board
+        table = self.transposition_table
+        pv = []
+        seen = set()
+        while len(pv) < max_length and board.zobrist_key not in seen:
+            seen.add(board.zobrist_key)
+            entry = table.probe(board.zobrist_key)
+            if not entry or not entry[3]:
+                break
+            move = Move.from_code(entry[3])
+            if not MoveGenerator(board).is_move_legal(move):
+                break
+            pv.append(move)
+            board.push(move)
+        for _ in pv:
+            board.pop()
+        return pv
+    
+    def alpha_beta(self, board, depth, alpha, beta, maximizing_player, ply=0):
         """Alpha-beta pruning search algorithm with optimizations for speed"""
         self.nodes_count += 1
+        if self.stop_event is not None and not self.nodes_count & 1023 and self.stop_event.is_set():
+            raise SearchStopped
+        ply_state = self.stack[ply]
         
-        # Check transposition table for previously computed positions
-        board_hash = hash(str(board))
-        if board_hash in self.transposition_table and self.transposition_table[board_hash]['depth'] >= depth:
-            return self.transposition_table[board_hash]['score'], self.transposition_table[board_hash]['move']
-        
-        # Check for immediate check resolution if in check
-        move_generator = MoveGenerator(board)
-        legal_moves = move_generator.generate_legal_moves()
+        # Check transposition table for previously computed positions: a deep
+        # enough entry ends the search if its bound is on the right side of the window
+        board_hash = board.zobrist_key
+        entry = self.transposition_table.probe(board_hash)
+        hash_move = None
+        if entry:
+            entry_depth, bound, score, move_code = entry
+            hash_move = Move.from_code(move_code) if move_code else None
+            if entry_depth >= depth and ply > 0 and (
+                    bound == EXACT
+                    or (bound == LOWER_BOUND and score >= beta)
+                    or (bound == UPPER_BOUND and score <= alpha)):
+                return score, hash_move
+        alpha_orig, beta_orig = alpha, beta
         
-        # Check for game end
-        if not legal_moves:
-            # Check if king is in check (checkmate)
-            king_pos = self._find_king(board)
-            if king_pos and board.is_square_attacked(king_pos[0], king_pos[1], 
-                                                  not board.active_color):
-                return -20000 if maximizing_player else 20000, None
-            else:
-                # Stalemate
-                return 0, None
+        # Check, king and pin information shared by move generation and evaluation
+        context = ply_state.node_context(board)
         
-        # Base case: leaf node
-        if depth == 0:
-            return self.evaluator.evaluate(board), None
+        # Base case: leaf node, resolved by the quiescence search
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.quiescence(board, alpha, beta, maximizing_player, ply, context), None
         
-        # Prioritize moves that get out of check
-        king_pos = self._find_king(board)
-        in_check = king_pos and board.is_square_attacked(king_pos[0], king_pos[1], not board.active_color)
+        # Tells checkmate from stalemate (in check the picker only generates evasions)
+        in_check = context.in_check
         
-        # Order moves to improve pruning
-        ordered_moves = self._order_moves(board, legal_moves, in_check)
+        # Generate moves lazily in stages: hash move, captures, killers, then ordered quiet moves
+        ordered_moves = MovePicker(board, hash_move, ply_state.killers, context=context,
+                                   order_quiets=self._order_quiets, buffers=ply_state)
         
         best_move = None
         if maximizing_player:
             max_eval = float('-inf')
             for move in ordered_moves:
-                new_board = board.make_move(move)
-                eval_score, _ = self.alpha_beta(new_board, depth - 1, alpha, beta, False)
+                board.push(move)
+                eval_score, _ = self.alpha_beta(board, depth - 1, alpha, beta, False, ply + 1)
+                board.pop()
                 
                 if eval_score > max_eval:
                     max_eval = eval_score
@@ -83,16 +189,22 @@ class Search:
                 
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:
+                    self._store_killer(ply_state, move)
+                    self._update_history(context.side, move, depth)
                     break
             
-            # Store in transposition table
-            self.transposition_table[board_hash] = {'depth': depth, 'score': max_eval, 'move': best_move}
+            # No moves: checkmate or stalemate
+            if best_move is None:
+                return (-20000 if in_check else 0), None
+            
+            self._store(board_hash, depth, max_eval, best_move, alpha_orig, beta_orig)
             return max_eval, best_move
         else:
             min_eval = float('inf')
             for move in ordered_moves:
-                new_board = board.make_move(move)
-                eval_score, _ = self.alpha_beta(new_board, depth - 1, alpha, beta, True)
+                board.push(move)
+                eval_score, _ = self.alpha_beta(board, depth - 1, alpha, beta, True, ply + 1)
+                board.pop()
                 
                 if eval_score < min_eval:
                     min_eval = eval_score
@@ -100,56 +212,176 @@ class Search:
                 
                 beta = min(beta, eval_score)
                 if beta <= alpha:
+                    self._store_killer(ply_state, move)
+                    self._update_history(context.side, move, depth)
                     break
             
-            # Store in transposition table
-            self.transposition_table[board_hash] = {'depth': depth, 'score': min_eval, 'move': best_move}
+            # No moves: checkmate or stalemate
+            if best_move is None:
+                return (20000 if in_check else 0), None
+            
+            self._store(board_hash, depth, min_eval, best_move, alpha_orig, beta_orig)
             return min_eval, best_move
     
-    def _order_moves(self, board, moves, in_check):
-        """Order moves to improve pruning efficiency with focus on check resolution"""
-        move_scores = []
+    def quiescence(self, board, alpha, beta, maximizing_player, ply, context=None):
+        """Search captures and promotions (every evasion when in check) until the
+        position is quiet, so leaves are never scored in the middle of an exchange"""
+        ply_state = self.stack[min(ply, MAX_PLY)]
+        if context is None:
+            context = ply_state.node_context(board)
+        
+        # Stand pat: out of check the side to move may decline every capture, so the
+        # static score already bounds the node (the evaluator also detects stalemate)
+        in_check = context.in_check
+        if in_check and ply < MAX_PLY:
+            stand_pat = None
+            best = float('-inf') if maximizing_player else float('inf')
+        else:
+            stand_pat = self.evaluator.evaluate(board, context)
+            if ply >= MAX_PLY:
+                return stand_pat
+            if maximizing_player:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best = stand_pat
+        
+        mailbox = board.mailbox
+        piece_values = self.evaluator.piece_values
+        for move in MovePicker(board, context=context, captures_only=True, buffers=ply_state):
+            code = move.code
+            flags = code >> 12
+            if stand_pat is not None:
+                # Delta pruning: skip captures that cannot reach the window even
+                # if the captured piece (and any promotion) is won outright
+                victim = mailbox[(code >> 6) & 63]
+                gain = piece_values[victim.piece_type] if victim else 0
+                if flags == EN_PASSANT:
+                    gain = piece_values[PieceType.PAWN]
+                if flags & PROMOTION:
+                    gain += piece_values[move.promotion_piece] - piece_values[PieceType.PAWN]
+                if maximizing_player:
+                    if stand_pat + gain + DELTA_MARGIN <= alpha:
+                        continue
+                elif stand_pat - gain - DELTA_MARGIN >= beta:
+                    continue
+                
+                # Skip captures that lose material once the recaptures are played out
+                if self.use_see and not flags & PROMOTION and static_exchange(board, move) < 0:
+                    continue
+            
+            # Counted here rather than on entry, where alpha_beta has already counted the
+            # horizon node
+            self.qnodes_count += 1
+            if self.stop_event is not None and not self.qnodes_count & 1023 and self.stop_event.is_set():
+                raise SearchStopped
+            board.push(move)
+            score = self.quiescence(board, alpha, beta, not maximizing_player, ply + 1)
+            board.pop()
+            
+            if maximizing_player:
+                if score > best:
+                    best = score
+                    alpha = max(alpha, score)
+            elif score < best:
+                best = score
+                beta = min(beta, score)
+            if beta <= alpha:
+                break
         
-        for move in moves:
+        # In check with no evasion: checkmate
+        if stand_pat is None and best in (float('-inf'), float('inf')):
+            return -20000 if maximizing_player else 20000
+        return best
+    
+    def _store(self, key, depth, score, best_move, alpha, beta):
+        """Store a node's result in the transposition table with its bound type"""
+        if score <= alpha:
+            bound = UPPER_BOUND
+        elif score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(key, depth, bound, score, best_move.code)
+    
+    def _store_killer(self, ply_state, move):
+        """Remember a quiet move that caused a cutoff, keeping the two most recent"""
+        if move.code >> 12 & (CAPTURE | PROMOTION):
+            return
+        killers = ply_state.killers
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+    
+    def _update_history(self, side, move, depth):
+        """Credit a quiet move that caused a cutoff, deeper cutoffs counting more"""
+        code = move.code
+        if code >> 12 & (CAPTURE | PROMOTION):
+            return
+        history = self.history
+        index = side << 12 | code & 0xFFF
+        history[index] += depth * depth
+        if history[index] > HISTORY_MAX:
+            self._age_history()
+    
+    def _age_history(self):
+        """Halve every history score"""
+        self.history = [score >> 1 for score in self.history]
+    
+    def _order_moves(self, board, moves, ply_state=None):
+        """Order moves in place to improve pruning efficiency, reusing the ply's
+        key buffer if given, and return the list"""
+        if ply_state is None:
+            ply_state = SearchPly()
+        
+        # Sort keys pack the negated score above the move's index in the list, so a
+        # plain sort orders best first (generation order on ties) without building
+        # (move, score) tuples or new moves
+        keys = ply_state.scores
+        keys.clear()
+        mailbox = board.mailbox
+        piece_values = self.evaluator.piece_values
+        history = self.history
+        side = 0 if board.active_color == Color.WHITE else 1
+        for index, move in enumerate(moves):
+            code = move.code
+            to_sq = (code >> 6) & 63
             score = 0
             
-            # If in check, prioritize moves that get out of check
-            if in_check:
-                score += 10000
-                
             # Prioritize captures by piece value
-            if move.is_capture:
-                victim = board.get_piece_at(*move.to_square)
+            if code >> 12 & CAPTURE:
+                victim = mailbox[to_sq]
                 if victim:
-                    score += 100 * self.evaluator.piece_values.get(victim.piece_type, 0)
+                    score += 100 * piece_values.get(victim.piece_type, 0)
             
             # Prioritize promotions
-            if hasattr(move, 'promotion_piece') and move.promotion_piece:
+            if code >> 12 & PROMOTION:
                 score += 900
             
+            # Quiet moves by cutoff history (MovePicker has already tried the killers)
+            if not code >> 12 & (CAPTURE | PROMOTION):
+                score += history[side << 12 | code & 0xFFF]
+            
             # Prioritize center control for pawns and knights in opening
-            if board.get_piece_at(*move.from_square):
-                piece_type = board.get_piece_at(*move.from_square).piece_type
-                if piece_type == 1:  # Pawn
+            piece = mailbox[code & 63]
+            if piece:
+                piece_type = piece.piece_type
+                if piece_type is PieceType.PAWN:
                     # Center control for pawns
-                    if 2 <= move.to_square[0] <= 5 and 2 <= move.to_square[1] <= 5:
+                    if 2 <= to_sq >> 3 <= 5 and 2 <= to_sq & 7 <= 5:
                         score += 50
-                elif piece_type == 2:  # Knight
+                elif piece_type is PieceType.KNIGHT:
                     # Knights to the center
-                    if 2 <= move.to_square[0] <= 5 and 2 <= move.to_square[1] <= 5:
+                    if 2 <= to_sq >> 3 <= 5 and 2 <= to_sq & 7 <= 5:
                         score += 30
             
-            move_scores.append((move, score))
+            keys.append(-score << 8 | index)
         
-        # Sort moves by score in descending order
-        move_scores.sort(key=lambda x: x[1], reverse=True)
-        return [move for move, _ in move_scores]
-    
-    def _find_king(self, board):
-        """Find the king position for the active player"""
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece and piece.piece_type == 6 and piece.color == board.active_color:
-                    return (rank, file)
-        return None
+        # Sort moves by score in descending order (no position has 256 legal moves)
+        keys.sort()
+        moves[:] = [moves[key & 0xFF] for key in keys]
+        return moves
@@ -1,27 +1,104 @@
-from Chess_Engine_in_python.utils.zobrist import ZobristHash
+from array import array
+
+# Bound types: how a stored score relates to the true value of the position
+EXACT = 0
+LOWER_BOUND = 1  # The search failed high: the value is at least the score
+UPPER_BOUND = 2  # The search failed low: the value is at most the score
+
+# Entry layout: each entry is two 64-bit words, the Zobrist key XOR the data
+# word and the data word itself. A torn or foreign entry fails the key check
+# instead of returning another position's data. The data word packs:
+#   bits 0-15   move code (0 when there is no move)
+#   bits 16-35  score, offset by _SCORE_BIAS
+#   bits 36-43  depth
+#   bits 44-45  bound type
+#   bits 46-51  search age
+_SCORE_BIAS = 1 << 19
+_AGE_MASK = 63
+
+# Entries sharing one index; a new position evicts the least valuable of them
+BUCKET_SIZE = 4
 
 class TranspositionTable:
-    def __init__(self, size=1000000):
-        self.size = size
-        self.table = {}
-        self.zobrist = ZobristHash()
-    
-    def store(self, board, depth, score, best_move):
-        """Store a position in the transposition table"""
-        key = self.zobrist.hash(board)
+    """Fixed-size, bucketed transposition table sized in megabytes.
+    Replacement prefers deep entries from the current search over shallow or
+    stale ones, so the memory used never grows past the requested size."""
+    
+    ENTRY_BYTES = 16
+    
+    def __init__(self, size_mb=16, buffer=None):
+        size = self.table_bytes(size_mb)
+        self.mask = size // (self.ENTRY_BYTES * BUCKET_SIZE) - 1
+        if buffer is None:
+            self.entries = array('Q', bytes(size))
+        else:
+            # Entries live in a caller's zeroed buffer (e.g. shared memory) of at least
+            # table_bytes(size_mb) bytes; writers need no lock thanks to the key check
+            self.entries = memoryview(buffer)[:size].cast('Q')
+        self.age = 0
+        self.hits = 0
+    
+    @classmethod
+    def table_bytes(cls, size_mb):
+        """Bytes of entry storage used by a table of the given size"""
+        # Round the bucket count down to a power of two so the index is a mask
+        buckets = max(1, size_mb * 1024 * 1024 // (cls.ENTRY_BYTES * BUCKET_SIZE))
+        return cls.ENTRY_BYTES * BUCKET_SIZE * (1 << (buckets.bit_length() - 1))
+    
+    def new_search(self):
+        """Start a new search, making entries from earlier searches replaceable"""
+        self.age = (self.age + 1) & _AGE_MASK
+    
+    def clear(self):
+        """Remove every entry"""
+        self.entries[:] = array('Q', bytes(8 * len(self.entries)))
+        self.age = 0
+        self.hits = 0
+    
+    def probe(self, key):
+        """Stored (depth, bound, score, move code) of a position, or None"""
+        entries = self.entries
+        start = (key & self.mask) * (BUCKET_SIZE * 2)
+        for slot in range(start, start + BUCKET_SIZE * 2, 2):
+            data = entries[slot + 1]
+            if entries[slot] ^ data == key and data:
+                self.hits += 1
+                return ((data >> 36) & 255, (data >> 44) & 3,
+                        ((data >> 16) & 0xFFFFF) - _SCORE_BIAS, data & 0xFFFF)
+        return None
+    
+    def store(self, key, depth, bound, score, move_code=0):
+        """Store a search result, replacing the least valuable entry of its bucket"""
+        entries = self.entries
+        age = self.age
+        start = (key & self.mask) * (BUCKET_SIZE * 2)
         
-        # Limit table size
-        if len(self.table) >= self.size:
-            # Simple strategy: clear the table when it gets too large
-            self.table.clear()
+        # Reuse the position's own entry if present, otherwise evict the entry
+        # with the lowest depth, counting each search of age as eight plies
+        victim = start
+        victim_value = None
+        for slot in range(start, start + BUCKET_SIZE * 2, 2):
+            data = entries[slot + 1]
+            if entries[slot] ^ data == key:
+                victim = slot
+                # Keep the old best move if this search did not find one
+                if not move_code:
+                    move_code = data & 0xFFFF
+                break
+            value = ((data >> 36) & 255) - 8 * ((age - (data >> 46)) & _AGE_MASK) if data else -1024
+            if victim_value is None or value < victim_value:
+                victim = slot
+                victim_value = value
         
-        self.table[key] = {
-            'depth': depth,
-            'score': score,
-            'best_move': best_move
-        }
-    
-    def get(self, board):
-        """Retrieve a position from the transposition table"""
-        key = self.zobrist.hash(board)
-        return self.table.get(key)
+        score = min(max(int(score), 1 - _SCORE_BIAS), _SCORE_BIAS - 1) + _SCORE_BIAS
+        data = age << 46 | bound << 44 | min(depth, 255) << 36 | score << 16 | move_code
+        entries[victim] = key ^ data
+        entries[victim + 1] = data
+    
+    def hashfull(self):
+        """Permille of the first thousand entries written by the current search"""
+        entries = self.entries
+        sample = min(1000, len(entries) // 2)
+        used = sum(1 for slot in range(1, sample * 2, 2)
+                   if entries[slot] and entries[slot] >> 46 == self.age)
+        return used * 1000 // sample
@@ -6,7 +6,6 @@ import time
 from Chess_Engine_in_python.engine.board import Board
 from Chess_Engine_in_python.engine.search import Search
 from Chess_Engine_in_python.ui.cli import CLI
-from Chess_Engine_in_python.ui.gui import GUI
 
 def main():
     parser = argparse.ArgumentParser(description='Chess Engine')
@@ -15,25 +14,39 @@ def main():
     parser.add_argument('--time', type=float, default=5.0, help='Search time limit in seconds')
     parser.add_argument('--gui', action='store_true', help='Use GUI interface')
     parser.add_argument('--perft', type=int, help='Run perft test to specified depth')
+    parser.add_argument('--hash', type=int, default=16, help='Perft hash table size in MB (0 to disable)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for perft and for Lazy SMP search')
+    parser.add_argument('--attack-maps', action='store_true',
+                        help='Track attack maps incrementally on every move in perft and search')
     args = parser.parse_args()
     
     # Initialize board
     board = Board(args.fen)
+    # Perft, Search and the parallel searches keep tracking on the copies they make
+    if args.attack_maps:
+        board.set_attack_tracking(True)
     
     # Run perft test if requested
     if args.perft is not None:
-        from chess_engine.tests.perft_tests import perft
+        from Chess_Engine_in_python.tests.perft_tests import perft, parallel_perft, PerftTable
         start_time = time.time()
-        nodes = perft(board, args.perft)
+        if args.workers > 1:
+            nodes = parallel_perft(board, args.perft, args.workers, args.hash)
+        else:
+            table = PerftTable(args.hash) if args.hash > 0 else None
+            nodes = perft(board, args.perft, table=table)
         elapsed = time.time() - start_time
-        print(f"Perft({args.perft}) = {nodes} nodes in {elapsed:.2f}s ({nodes/elapsed:.0f} nps)")
+        print(f"Perft({args.perft}) = {nodes} nodes in {elapsed:.2f}s ({nodes/max(elapsed, 1e-9):.0f} nps)")
         return
     
     # Start UI
     if args.gui:
-        ui = GUI(board, args.depth, args.time)
+        # Imported here: the GUI exits at import time when Tkinter is missing
+        from Chess_Engine_in_python.ui.gui import GUI
+        ui = GUI(board, args.depth, args.time, args.workers)
     else:
-        ui = CLI(board, args.depth, args.time)
+        ui = CLI(board, args.depth, args.time, args.workers)
     
     ui.run()
 
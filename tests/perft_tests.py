@@ -1,28 +1,73 @@
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from Chess_Engine_in_python.engine.board import Board
-from Chess_Engine_in_python.engine.move import MoveGenerator
+from Chess_Engine_in_python.engine.move import Move, MoveGenerator
 
-def perft(board, depth):
+class PerftTable:
+    """Fixed-size (Zobrist key, depth) -> node count table for perft.
+    Each slot holds the key and the count packed with the depth (6 bits);
+    a new result always replaces the old one."""
+    
+    ENTRY_BYTES = 16
+    
+    def __init__(self, size_mb=16):
+        # Round the slot count down to a power of two so the index is a mask
+        slots = max(1, size_mb * 1024 * 1024 // self.ENTRY_BYTES)
+        self.mask = (1 << (slots.bit_length() - 1)) - 1
+        self.keys = array('Q', bytes(8 * (self.mask + 1)))
+        self.values = array('Q', bytes(8 * (self.mask + 1)))
+        self.hits = 0
+    
+    def get(self, key, depth):
+        """Node count stored for the position and depth, or None"""
+        index = key & self.mask
+        value = self.values[index]
+        if self.keys[index] == key and value & 63 == depth:
+            self.hits += 1
+            return value >> 6
+        return None
+    
+    def store(self, key, depth, nodes):
+        """Store the node count of a position searched to a depth"""
+        index = key & self.mask
+        self.keys[index] = key
+        self.values[index] = nodes << 6 | depth
+
+def perft(board, depth, cache=None, table=None):
     """
     Performance test function to count the number of leaf nodes at a given depth
-    Used to verify move generation correctness
+    Used to verify move generation correctness. An optional MoveCache reuses the
+    move lists of transposed positions, and an optional PerftTable reuses the
+    counts of whole transposed subtrees.
     """
     if depth == 0:
         return 1
     
-    nodes = 0
-    move_generator = MoveGenerator(board)
+    if table is not None:
+        nodes = table.get(board.zobrist_key, depth)
+        if nodes is not None:
+            return nodes
+    
+    move_generator = MoveGenerator(board, cache)
     legal_moves = move_generator.generate_legal_moves()
     
+    # Bulk counting: the last ply only needs the number of legal moves
     if depth == 1:
-        return len(legal_moves)
-    
-    for move in legal_moves:
-        new_board = board.make_move(move)
-        nodes += perft(new_board, depth - 1)
+        nodes = len(legal_moves)
+    else:
+        nodes = 0
+        for move in legal_moves:
+            board.push(move)
+            nodes += perft(board, depth - 1, cache, table)
+            board.pop()
     
+    if table is not None:
+        table.store(board.zobrist_key, depth, nodes)
     return nodes
 
-def perft_divide(board, depth):
+def perft_divide(board, depth, table=None):
     """
     Divide perft function that shows the node count for each move
     Useful for debugging move generation
@@ -32,15 +77,80 @@ def perft_divide(board, depth):
     total_nodes = 0
     
     for move in legal_moves:
-        new_board = board.make_move(move)
-        nodes = perft(new_board, depth - 1)
+        board.push(move)
+        nodes = perft(board, depth - 1, table=table)
+        board.pop()
+        total_nodes += nodes
+        print(f"{move}: {nodes}")
+    
+    print(f"\nTotal: {total_nodes}")
+    return total_nodes
+
+# Per-process perft hash table, created by the pool initializer
+_worker_table = None
+
+def _init_worker(hash_mb):
+    """Prepare a perft worker process: the engine modules (and with them the
+    magic attack tables) are loaded once here rather than per task"""
+    global _worker_table
+    _worker_table = PerftTable(hash_mb) if hash_mb else None
+
+def _perft_task(fen, codes, depth, attack_tracking=False):
+    """Count the nodes below a line of moves (packed codes) played from a FEN"""
+    board = Board(fen)
+    board.set_attack_tracking(attack_tracking)
+    for code in codes:
+        board.push(Move.from_code(code))
+    return perft(board, depth, table=_worker_table)
+
+def parallel_perft_counts(board, depth, workers=None, hash_mb=16):
+    """Node count below each root move, computed across worker processes; the
+    workers track attack maps when the board does.
+    Returns a list of (move, nodes) in move generation order."""
+    workers = workers or os.cpu_count() or 1
+    fen = board.to_fen()
+    tracking = board.attack_maps is not None
+    root_moves = MoveGenerator(board).generate_legal_moves()
+    if depth <= 1:
+        return [(move, 1) for move in root_moves]
+    
+    # Split one ply deeper when there are too few root moves to keep every worker busy
+    tasks = []
+    for move in root_moves:
+        if depth > 2 and len(root_moves) < workers * 4:
+            board.push(move)
+            for reply in MoveGenerator(board).generate_legal_moves():
+                tasks.append((move, (move.code, reply.code), depth - 2))
+            board.pop()
+        else:
+            tasks.append((move, (move.code,), depth - 1))
+    
+    counts = {move: 0 for move in root_moves}
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(hash_mb,)) as pool:
+        futures = [(move, pool.submit(_perft_task, fen, codes, task_depth, tracking))
+                   for move, codes, task_depth in tasks]
+        for move, future in futures:
+            counts[move] += future.result()
+    
+    return [(move, counts[move]) for move in root_moves]
+
+def parallel_perft(board, depth, workers=None, hash_mb=16):
+    """Perft using a pool of worker processes"""
+    if depth == 0:
+        return 1
+    return sum(nodes for _, nodes in parallel_perft_counts(board, depth, workers, hash_mb))
+
+def parallel_perft_divide(board, depth, workers=None, hash_mb=16):
+    """Divide perft using a pool of worker processes"""
+    total_nodes = 0
+    for move, nodes in parallel_perft_counts(board, depth, workers, hash_mb):
         total_nodes += nodes
         print(f"{move}: {nodes}")
     
     print(f"\nTotal: {total_nodes}")
     return total_nodes
 
-def run_perft_tests():
+def run_perft_tests(hash_mb=16):
     """Run a series of perft tests on known positions"""
     test_positions = [
         # Initial position
@@ -49,14 +159,14 @@ def run_perft_tests():
             (2, 400),
             (3, 8902),
             (4, 197281),
-            # (5, 4865609),  # Uncomment for deeper tests (slower)
+            (5, 4865609),
         ]),
         # Position 2 (Kiwipete)
         ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", [
             (1, 48),
             (2, 2039),
             (3, 97862),
-            # (4, 4085603),  # Uncomment for deeper tests (slower)
+            (4, 4085603),
         ]),
         # Position 3
         ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [
@@ -64,17 +174,18 @@ def run_perft_tests():
             (2, 191),
             (3, 2812),
             (4, 43238),
-            # (5, 674624),  # Uncomment for deeper tests (slower)
+            (5, 674624),
         ]),
     ]
     
     for fen, depths in test_positions:
         print(f"Testing position: {fen}")
         board = Board(fen)
+        table = PerftTable(hash_mb) if hash_mb else None
         
         for depth, expected in depths:
             start_time = time.time()
-            nodes = perft(board, depth)
+            nodes = perft(board, depth, table=table)
             elapsed = time.time() - start_time
             
             result = "PASS" if nodes == expected else f"FAIL (expected {expected})"
@@ -83,5 +194,4 @@ def run_perft_tests():
         print()
 
 if __name__ == "__main__":
-    import time
     run_perft_tests()
@@ -1,5 +1,6 @@
 import unittest
 from Chess_Engine_in_python.engine.board import Board, PieceType, Color, Piece
+from Chess_Engine_in_python.utils.bitboard import BitBoardPatterns
 
 class TestBoard(unittest.TestCase):
     def test_initial_position(self):
@@ -82,7 +83,7 @@ class TestBoard(unittest.TestCase):
         board = Board()
         
         # Test pawn move
-        from chess_engine.engine.move import Move
+        from Chess_Engine_in_python.engine.move import Move
         move = Move((6, 4), (4, 4))  # e2-e4
         new_board = board.make_move(move)
         
@@ -125,14 +126,314 @@ class TestBoard(unittest.TestCase):
         
         # Test en passant capture
         board = Board("rnbqkbnr/ppp2ppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 1")
-        move = Move((4, 4), (3, 3), is_capture=True, is_en_passant=True)  # e5xd6 e.p.
+        move = Move((3, 4), (2, 3), is_capture=True, is_en_passant=True)  # e5xd6 e.p.
         new_board = board.make_move(move)
         
         # Check that the en passant capture happened
-        self.assertIsNone(new_board.get_piece_at(4, 4))
-        self.assertIsNone(new_board.get_piece_at(4, 3))  # Captured pawn
-        self.assertEqual(new_board.get_piece_at(3, 3).piece_type, PieceType.PAWN)
-        self.assertEqual(new_board.get_piece_at(3, 3).color, Color.WHITE)
+        self.assertIsNone(new_board.get_piece_at(3, 4))
+        self.assertIsNone(new_board.get_piece_at(3, 3))  # Captured pawn
+        self.assertEqual(new_board.get_piece_at(2, 3).piece_type, PieceType.PAWN)
+        self.assertEqual(new_board.get_piece_at(2, 3).color, Color.WHITE)
+    
+    def test_bitboards(self):
+        """Test that piece bitboards, occupancy and the squares view agree"""
+        board = Board()
+        
+        # White pawns fill rank 2 (board rank index 6), black pawns rank 7
+        self.assertEqual(board.get_bitboard(PieceType.PAWN, Color.WHITE).value,
+                         BitBoardPatterns.rank_mask(6).value)
+        self.assertEqual(board.get_bitboard(PieceType.PAWN, Color.BLACK).value,
+                         BitBoardPatterns.rank_mask(1).value)
+        self.assertEqual(board.get_bitboard(PieceType.KING, Color.WHITE).get_least_significant_bit(), 7 * 8 + 4)
+        self.assertEqual(board.get_occupancy(Color.WHITE).count_bits(), 16)
+        self.assertEqual(board.get_occupancy().count_bits(), 32)
+        
+        # Squares view mirrors get_piece_at
+        squares = board.squares
+        for rank in range(8):
+            for file in range(8):
+                self.assertIs(squares[rank][file], board.get_piece_at(rank, file))
+        
+        # Captures and castling keep the bitboards in sync with the mailbox
+        from Chess_Engine_in_python.engine.move import Move
+        board = Board("r3k2r/pppppppp/8/8/8/8/PPPPPPPP/R3K2R w KQkq - 0 1")
+        new_board = board.make_move(Move((7, 4), (7, 6), is_castling=True))
+        self.assertEqual(new_board.get_bitboard(PieceType.ROOK, Color.WHITE).value,
+                         (1 << (7 * 8 + 0)) | (1 << (7 * 8 + 5)))
+        for square in range(64):
+            piece = new_board.mailbox[square]
+            occupied = (new_board.occupied >> square) & 1
+            self.assertEqual(occupied, 1 if piece else 0)
+    
+    def test_push_pop(self):
+        """Test that push/pop make and unmake moves in place"""
+        from Chess_Engine_in_python.engine.move import MoveGenerator
+        
+        fens = [
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "rnbqkbnr/ppp2ppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 1",
+            "r3k3/1P6/8/8/8/8/8/4K3 w q - 0 1",
+        ]
+        for fen in fens:
+            board = Board(fen)
+            bitboards = board.bitboards[:]
+            for move in MoveGenerator(board).generate_legal_moves():
+                # push must agree with the copying make_move
+                expected = board.make_move(move).to_fen()
+                board.push(move)
+                self.assertEqual(board.to_fen(), expected)
+                self.assertIs(board.pop(), move)
+                self.assertEqual(board.to_fen(), fen)
+                self.assertEqual(board.bitboards, bitboards)
+        
+        # make_move leaves the original board untouched
+        board = Board()
+        from Chess_Engine_in_python.engine.move import Move
+        board.make_move(Move((6, 4), (4, 4)))
+        self.assertEqual(board.to_fen(), fens[0])
+    
+    def test_zobrist_key(self):
+        """Test that the incremental Zobrist key matches a full rehash"""
+        from Chess_Engine_in_python.engine.move import Move, MoveGenerator
+        from Chess_Engine_in_python.utils.zobrist import ZobristHash
+        zobrist = ZobristHash()
+        
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        for move in MoveGenerator(board).generate_legal_moves():
+            board.push(move)
+            self.assertEqual(board.zobrist_key, zobrist.hash(board))
+            for reply in MoveGenerator(board).generate_legal_moves():
+                board.push(reply)
+                self.assertEqual(board.zobrist_key, zobrist.hash(board))
+                board.pop()
+            board.pop()
+            self.assertEqual(board.zobrist_key, zobrist.hash(board))
+        
+        # Transpositions reach the same key and compare equal
+        first = Board().make_move(Move((7, 6), (5, 5))).make_move(Move((0, 6), (2, 5)))
+        first = first.make_move(Move((7, 1), (5, 2))).make_move(Move((0, 1), (2, 2)))
+        second = Board().make_move(Move((7, 1), (5, 2))).make_move(Move((0, 1), (2, 2)))
+        second = second.make_move(Move((7, 6), (5, 5))).make_move(Move((0, 6), (2, 5)))
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertNotEqual(first, Board())
+    
+    def test_shared_pieces(self):
+        """Test that pieces are immutable shared instances with integer codes"""
+        import copy
+        import pickle
+        from Chess_Engine_in_python.engine.board import PIECES
+        
+        self.assertEqual(len(PIECES), 12)
+        for code, piece in enumerate(PIECES):
+            self.assertEqual(piece.code, code)
+            self.assertIs(Piece(piece.piece_type, piece.color), piece)
+            self.assertIs(copy.deepcopy(piece), piece)
+            self.assertIs(pickle.loads(pickle.dumps(piece)), piece)
+        
+        white_queen = Piece(PieceType.QUEEN, Color.WHITE)
+        self.assertEqual(str(white_queen), 'Q')
+        self.assertEqual(str(Piece(PieceType.KNIGHT, Color.BLACK)), 'n')
+        with self.assertRaises(AttributeError):
+            white_queen.color = Color.BLACK
+        
+        # Boards share the piece instances
+        board = Board()
+        self.assertIs(board.get_piece_at(7, 3), white_queen)
+        self.assertIs(board.get_piece_at(0, 4), Piece(PieceType.KING, Color.BLACK))
+    
+    def test_is_square_attacked(self):
+        """Test attack detection for every piece type"""
+        board = Board()
+        
+        # Pawns and knights cover the third rank, nothing reaches the middle
+        for file in range(8):
+            self.assertTrue(board.is_square_attacked(5, file, Color.WHITE))
+            self.assertTrue(board.is_square_attacked(2, file, Color.BLACK))
+            self.assertFalse(board.is_square_attacked(4, file, Color.WHITE))
+            self.assertFalse(board.is_square_attacked(3, file, Color.BLACK))
+        
+        # Sliders are blocked by the first piece on the ray
+        board = Board("4k3/8/8/8/1b2R3/8/3P4/4K3 w - - 0 1")
+        self.assertTrue(board.is_square_attacked(4, 1, Color.WHITE))   # Re4 hits Bb4
+        self.assertFalse(board.is_square_attacked(4, 0, Color.WHITE))  # ...but not past it
+        self.assertTrue(board.is_square_attacked(0, 4, Color.WHITE))   # Re4 up the file
+        self.assertTrue(board.is_square_attacked(5, 2, Color.BLACK))   # Bb4 to c3
+        self.assertFalse(board.is_square_attacked(7, 4, Color.BLACK))  # d2 pawn blocks Bb4
+        self.assertTrue(board.is_square_attacked(1, 3, Color.BLACK))   # Black king
+        self.assertFalse(board.is_square_attacked(2, 4, Color.BLACK))
+        
+        # Pawn attacks point forward only
+        board = Board("4k3/8/8/3p4/8/8/8/4K3 w - - 0 1")
+        self.assertTrue(board.is_square_attacked(4, 2, Color.BLACK))
+        self.assertTrue(board.is_square_attacked(4, 4, Color.BLACK))
+        self.assertFalse(board.is_square_attacked(2, 2, Color.BLACK))
+        
+        # attackers_to agrees with is_square_attacked
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        for square in range(64):
+            for side, color in ((0, Color.WHITE), (1, Color.BLACK)):
+                self.assertEqual(bool(board.attackers_to(square, side)),
+                                 board.is_square_attacked(square // 8, square % 8, color))
+    
+    def test_king_squares_and_piece_squares(self):
+        """Test that king squares and piece squares follow moves and undos"""
+        from Chess_Engine_in_python.engine.move import Move
+        board = Board("r3k2r/pppppppp/8/8/8/8/PPPPPPPP/R3K2R w KQkq - 0 1")
+        self.assertEqual(board.find_king(Color.WHITE), (7, 4))
+        self.assertEqual(board.find_king(Color.BLACK), (0, 4))
+        self.assertEqual(board.piece_squares(Color.BLACK), [0, 4, 7] + list(range(8, 16)))
+        
+        board.push(Move((7, 4), (7, 2), is_castling=True))
+        self.assertEqual(board.find_king(Color.WHITE), (7, 2))
+        self.assertIn(7 * 8 + 3, board.piece_squares(Color.WHITE))
+        self.assertNotIn(7 * 8 + 0, board.piece_squares(Color.WHITE))
+        board.pop()
+        self.assertEqual(board.find_king(Color.WHITE), (7, 4))
+        
+        self.assertIsNone(Board("8/8/8/8/8/8/8/4K3 w - - 0 1").find_king(Color.BLACK))
+    
+    def test_castling_rights_on_rook_capture(self):
+        """Test that capturing a rook on its home square removes that castling right"""
+        from Chess_Engine_in_python.engine.move import Move
+        
+        board = Board("r3k2r/8/8/8/8/8/6b1/R3K2R b KQkq - 0 1")
+        board.push(Move((6, 6), (7, 7), is_capture=True))
+        self.assertFalse(board.castling_rights[Color.WHITE]['kingside'])
+        self.assertTrue(board.castling_rights[Color.WHITE]['queenside'])
+        self.assertTrue(board.castling_rights[Color.BLACK]['kingside'])
+        
+        # A rook on the h-file away from its corner does not affect castling
+        board = Board("r3k2r/8/8/8/8/8/7R/R3K2R w KQkq - 0 1")
+        board.push(Move((6, 7), (5, 7)))
+        self.assertTrue(board.castling_rights[Color.WHITE]['kingside'])
+        self.assertTrue(board.castling_rights[Color.WHITE]['queenside'])
+    
+    def test_game_end_predicates(self):
+        """Test check, checkmate and stalemate detection"""
+        board = Board()
+        self.assertFalse(board.is_check())
+        self.assertTrue(board.has_legal_move())
+        self.assertFalse(board.is_checkmate() or board.is_stalemate())
+        
+        # Fool's mate
+        board = Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 0 1")
+        self.assertTrue(board.is_check())
+        self.assertFalse(board.has_legal_move())
+        self.assertTrue(board.is_checkmate())
+        self.assertFalse(board.is_stalemate())
+        
+        # Stalemate: the lone black king is not in check, but the white queen and king
+        # cover every square it could move to
+        board = Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+        self.assertFalse(board.is_check())
+        self.assertTrue(board.is_stalemate())
+        
+        # In check, but the rook can capture the knight
+        board = Board("5rrk/5Npp/8/8/8/8/8/6K1 b - - 0 1")
+        self.assertTrue(board.is_check())
+        self.assertTrue(board.has_legal_move())
+        self.assertFalse(board.is_checkmate())
+    
+    def test_attack_maps(self):
+        """Test that tracked attack maps match on-demand attack detection through push and pop"""
+        from Chess_Engine_in_python.engine.move import MoveGenerator
+        
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        board.push(MoveGenerator(board).generate_legal_moves()[0])
+        board.set_attack_tracking(True)
+        
+        def expected_maps():
+            return [board.compute_attacks(0), board.compute_attacks(1)]
+        
+        self.assertEqual(board.attack_maps, expected_maps())
+        for move in MoveGenerator(board).generate_legal_moves():
+            board.push(move)
+            self.assertEqual(board.attack_maps, expected_maps())
+            # Replies too, so the incremental updates are applied on top of each other
+            for reply in MoveGenerator(board).generate_legal_moves():
+                board.push(reply)
+                self.assertEqual(board.attack_maps, expected_maps())
+                # The check test reads the maps; it must agree with the attacker lookup
+                side = 0 if board.active_color == Color.WHITE else 1
+                self.assertEqual(MoveGenerator(board).is_check(),
+                                 bool(board.attackers_to(board.king_squares[side], side ^ 1)))
+                board.pop()
+            board.pop()
+            self.assertEqual(board.attack_maps, expected_maps())
+        
+        # Popping past the point tracking started recomputes the maps
+        board.pop()
+        self.assertEqual(board.attack_maps, expected_maps())
+        
+        # The full rebuild agrees with a square-by-square attacker lookup
+        self.assertEqual(expected_maps(), [sum(1 << square for square in range(64)
+                                               if board.attackers_to(square, side))
+                                           for side in (0, 1)])
+        
+        board.set_attack_tracking(False)
+        self.assertIsNone(board.attack_maps)
+        self.assertTrue(board.is_square_attacked(5, 3, Color.WHITE))
+        
+        # Deeper walks of other perft positions, checked at every node
+        def walk(depth):
+            self.assertEqual(board.attack_maps, expected_maps())
+            if depth:
+                for move in MoveGenerator(board).generate_legal_moves():
+                    board.push(move)
+                    walk(depth - 1)
+                    board.pop()
+        
+        for fen in ["8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"]:
+            board = Board(fen)
+            board.set_attack_tracking(True)
+            walk(3)
+    
+    def test_fen_round_trip(self):
+        """Test that FEN generation reproduces the parsed position"""
+        for fen in [
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+            "rnbqkbnr/ppp2ppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 1",
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        ]:
+            self.assertEqual(Board(fen).to_fen(), fen)
+        
+        board = Board("rnbqkbnr/ppp2ppp/8/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 1")
+        self.assertEqual(board.en_passant_target, (2, 3))
+    
+    def test_compact_state(self):
+        """Test the castling mask, en passant square and their compatibility accessors"""
+        from Chess_Engine_in_python.engine.board import CASTLE_WHITE_KINGSIDE, CASTLE_BLACK_QUEENSIDE
+        from Chess_Engine_in_python.engine.move import Move
+        from Chess_Engine_in_python.utils.zobrist import ZobristHash
+        
+        board = Board("r3k2r/8/8/8/8/8/8/R3K2R w Kq - 0 1")
+        self.assertFalse(hasattr(board, '__dict__'))
+        self.assertEqual(board.castling, CASTLE_WHITE_KINGSIDE | CASTLE_BLACK_QUEENSIDE)
+        self.assertEqual(board.ep_square, -1)
+        
+        # The dict accessor and its setter agree with the mask and keep the hash in sync
+        rights = board.castling_rights
+        rights[Color.WHITE]['queenside'] = True
+        board.castling_rights = rights
+        self.assertEqual(board.castling, 11)
+        self.assertEqual(board.zobrist_key, ZobristHash().hash(board))
+        
+        # A double pawn push sets the square; pop and copy restore it
+        board = Board()
+        board.push(Move((6, 4), (4, 4)))
+        self.assertEqual(board.ep_square, 5 * 8 + 4)
+        self.assertEqual(board.en_passant_target, (5, 4))
+        board.push(Move((1, 4), (3, 4)))
+        copy = board.copy()
+        board.push(Move((7, 4), (6, 4)))
+        self.assertEqual((board.ep_square, board.castling), (-1, 12))
+        board.pop()
+        self.assertEqual((board.ep_square, board.castling), (copy.ep_square, copy.castling))
+        self.assertEqual(board.zobrist_key, ZobristHash().hash(board))
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,15 @@
 import unittest
 from Chess_Engine_in_python.engine.board import Board, PieceType, Color
-from Chess_Engine_in_python.engine.move import Move, MoveGenerator
+from Chess_Engine_in_python.engine.move import (
+    Move, MoveGenerator, MovePicker, NodeContext, pack_moves, unpack_moves, static_exchange
+)
+from Chess_Engine_in_python.engine.move_cache import MoveCache
+from Chess_Engine_in_python.tests.perft_tests import perft, PerftTable, parallel_perft, parallel_perft_counts
+
+try:
+    from Chess_Engine_in_python.engine import batch
+except ImportError:  # NumPy is optional
+    batch = None
 
 class TestMoves(unittest.TestCase):
     def test_pawn_moves(self):
@@ -168,6 +177,18 @@ class TestMoves(unittest.TestCase):
         # Should have 27 moves (horizontals, verticals, and diagonals)
         self.assertEqual(len(queen_moves), 27)
     
+    def test_sliding_attack_tables(self):
+        """Test magic-bitboard lookups against the ray-scan attacks"""
+        import random
+        from Chess_Engine_in_python.utils import bitboard, magic
+        
+        rng = random.Random(1)
+        for _ in range(2000):
+            square = rng.randrange(64)
+            occupied = rng.getrandbits(64) & rng.getrandbits(64)
+            self.assertEqual(magic.rook_attacks(square, occupied), bitboard.rook_attacks(square, occupied))
+            self.assertEqual(magic.bishop_attacks(square, occupied), bitboard.bishop_attacks(square, occupied))
+    
     def test_king_moves(self):
         """Test king move generation"""
         # King in the center
@@ -194,6 +215,75 @@ class TestMoves(unittest.TestCase):
         castling_moves = [move for move in king_moves if move.is_castling]
         self.assertEqual(len(castling_moves), 2)
     
+    def test_move_encoding(self):
+        """Test packing moves into 16-bit codes and back"""
+        move = Move((6, 4), (4, 4))
+        self.assertEqual(move.from_square, (6, 4))
+        self.assertEqual(move.to_square, (4, 4))
+        self.assertFalse(move.is_capture or move.is_castling or move.is_en_passant)
+        self.assertIsNone(move.promotion_piece)
+        self.assertEqual(str(move), "e2e4")
+        self.assertLess(move.code, 1 << 16)
+        
+        move = Move((1, 0), (0, 1), is_capture=True, promotion_piece=PieceType.KNIGHT)
+        self.assertTrue(move.is_capture)
+        self.assertEqual(move.promotion_piece, PieceType.KNIGHT)
+        self.assertEqual(str(move), "a7b8n")
+        move.promotion_piece = PieceType.QUEEN
+        self.assertEqual(str(move), "a7b8q")
+        self.assertTrue(move.is_capture)
+        
+        self.assertTrue(Move((7, 4), (7, 2), is_castling=True).is_castling)
+        self.assertTrue(Move((3, 4), (2, 3), is_capture=True, is_en_passant=True).is_en_passant)
+        self.assertEqual(Move((6, 4), (4, 4)), Move.from_code(Move((6, 4), (4, 4)).code))
+        
+        # Move lists round-trip through array('H')
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        moves = MoveGenerator(board).generate_legal_moves()
+        packed = pack_moves(moves)
+        self.assertEqual(packed.typecode, 'H')
+        self.assertEqual(unpack_moves(packed), moves)
+    
+    def test_move_picker(self):
+        """Test staged move ordering"""
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        all_moves = MoveGenerator(board).generate_legal_moves()
+        
+        # Same moves as the full generator, each exactly once
+        hash_move = Move((6, 0), (5, 0))
+        killer = Move((6, 6), (5, 6))
+        picked = list(MovePicker(board, hash_move, killers=(killer, Move((7, 0), (2, 0)))))
+        self.assertEqual(len(picked), len(set(picked)))
+        self.assertEqual(set(picked), set(all_moves))
+        
+        # Hash move first, then captures (most valuable victim first), then the killer
+        self.assertEqual(picked[0], hash_move)
+        captures = [move for move in all_moves if move.is_capture]
+        self.assertEqual(set(picked[1:len(captures) + 1]), set(captures))
+        self.assertEqual(picked[1], Move((6, 4), (2, 0), is_capture=True))
+        self.assertEqual(picked[len(captures) + 1], killer)
+        
+        # Captures only, unless in check
+        picked = list(MovePicker(board, captures_only=True))
+        self.assertEqual(set(picked), set(MoveGenerator(board).generate_captures()))
+        board = Board("4k3/8/8/8/8/8/4q3/R3K3 w - - 0 1")
+        picked = list(MovePicker(board, captures_only=True))
+        self.assertEqual(set(picked), set(MoveGenerator(board).generate_legal_moves()))
+    
+    def test_static_exchange(self):
+        """Test static exchange evaluation of captures"""
+        # Undefended pawn
+        board = Board("4k3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1")
+        self.assertEqual(static_exchange(board, Move((6, 3), (3, 3), is_capture=True)), 100)
+        
+        # Pawn defended by a pawn: the rook is lost, the second rook takes a pawn back
+        board = Board("4k3/8/4p3/3p4/8/8/3R4/3RK3 w - - 0 1")
+        self.assertEqual(static_exchange(board, Move((6, 3), (3, 3), is_capture=True)), -300)
+        
+        # Queen takes a rook defended by the rook behind it (an x-ray through the first)
+        board = Board("4k3/8/8/3q4/8/8/3R4/3RK3 b - - 0 1")
+        self.assertEqual(static_exchange(board, Move((3, 3), (6, 3), is_capture=True)), -400)
+    
     def test_legal_moves(self):
         """Test legal move generation"""
         # Initial position
@@ -222,6 +312,156 @@ class TestMoves(unittest.TestCase):
         
         # Should have 0 legal moves in checkmate
         self.assertEqual(len(legal_moves), 0)
+    
+    def test_pins_and_checks(self):
+        """Test that pinned pieces, checks and en passant are filtered correctly"""
+        # The knight on e2 is pinned by the rook on e8 and cannot move
+        board = Board("4r1k1/8/8/8/8/8/4N3/4K3 w - - 0 1")
+        move_generator = MoveGenerator(board)
+        legal_moves = move_generator.generate_legal_moves()
+        self.assertFalse([move for move in legal_moves if move.from_square == (6, 4)])
+        self.assertFalse(move_generator.is_move_legal(Move((6, 4), (4, 3))))
+        self.assertTrue(move_generator.is_move_legal(Move((7, 4), (7, 3))))
+        
+        # A pinned rook may still move along the pin and capture the pinner
+        board = Board("4r1k1/8/8/8/8/8/4R3/4K3 w - - 0 1")
+        moves = [move for move in MoveGenerator(board).generate_legal_moves() if move.from_square == (6, 4)]
+        self.assertEqual(len(moves), 6)
+        
+        # In check from the rook only king moves, captures of the checker and blocks are legal
+        board = Board("4r1k1/8/8/8/8/R7/3B4/4K3 w - - 0 1")
+        moves = MoveGenerator(board).generate_legal_moves()
+        self.assertEqual(sorted(str(move) for move in moves),
+                         ['a3e3', 'd2e3', 'e1d1', 'e1f1', 'e1f2'])
+        
+        # En passant that would expose the king along the rank is illegal
+        board = Board("8/8/8/KPp4r/8/8/8/7k w - c6 0 1")
+        self.assertNotIn('b5c6', [str(move) for move in MoveGenerator(board).generate_legal_moves()])
+    
+    def test_captures_and_evasions(self):
+        """Test the capture-only and check evasion generators"""
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        move_generator = MoveGenerator(board)
+        legal_moves = move_generator.generate_legal_moves()
+        self.assertEqual(set(move_generator.generate_captures()),
+                         {move for move in legal_moves if move.is_capture})
+        
+        # Promotions are included even without a capture
+        board = Board("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(len(MoveGenerator(board).generate_captures()), 4)
+        
+        # Single check: king moves, capturing the checker or blocking
+        board = Board("4r1k1/8/8/8/8/R7/3B4/4K3 w - - 0 1")
+        move_generator = MoveGenerator(board)
+        self.assertEqual(set(move_generator.generate_evasions()), set(move_generator.generate_legal_moves()))
+        
+        # Blocking with a pawn push (single or double) and capturing the checker by promotion
+        # or en passant
+        for fen in ["4k3/8/8/b7/8/8/1PP5/4K3 w - - 0 1", "r3k3/1P6/8/8/8/8/8/K7 w - - 0 1",
+                    "8/8/8/2k5/3Pp3/8/8/4K3 b - d3 0 1"]:
+            move_generator = MoveGenerator(Board(fen))
+            self.assertEqual(sorted(move.code for move in move_generator.generate_evasions()),
+                             sorted(move.code for move in move_generator.generate_legal_moves()))
+        
+        # Double check: only the king may move
+        board = Board("4r1k1/8/8/8/8/3n4/3B4/4K2R w K - 0 1")
+        evasions = MoveGenerator(board).generate_evasions()
+        self.assertTrue(evasions)
+        self.assertTrue(all(move.from_square == (7, 4) for move in evasions))
+    
+    def test_node_context(self):
+        """Test the per-node context shared by search and evaluation"""
+        board = Board("4r1k1/8/8/8/8/R7/3B4/4K3 w - - 0 1")
+        context = NodeContext(board)
+        self.assertTrue(context.in_check)
+        self.assertEqual(context.king_squares, (60, 6))
+        self.assertEqual(context.checkers, 1 << 4)
+        self.assertIs(context.moves, context.moves)
+        self.assertEqual(set(context.moves), set(MoveGenerator(board).generate_legal_moves()))
+        self.assertTrue(context.has_legal_move())
+        
+        # The picker reuses the context's generator
+        picker = MovePicker(board, context=context)
+        self.assertIs(picker.generator, context.generator)
+    
+    def test_move_cache(self):
+        """Test the Zobrist-keyed legal move cache"""
+        cache = MoveCache(size=2)
+        board = Board()
+        moves = MoveGenerator(board, cache).generate_legal_moves()
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        
+        # A second generator for the same position is served from the cache
+        cached = MoveGenerator(Board(), cache).generate_legal_moves()
+        self.assertEqual(cached, moves)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        
+        # The least recently used position is evicted
+        board.push(Move((6, 4), (4, 4)))
+        MoveGenerator(board, cache).generate_legal_moves()
+        board.push(Move((1, 4), (3, 4)))
+        MoveGenerator(board, cache).generate_legal_moves()
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(Board()))
+        
+        # Perft gives the same counts with the cache
+        self.assertEqual(perft(Board(), 3, MoveCache()), 8902)
+    
+    @unittest.skipIf(batch is None, "NumPy not installed")
+    def test_batch_move_generation(self):
+        """Test that batched move masks match the scalar generator"""
+        boards = []
+        for fen in ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                    "8/8/8/KPp4r/8/8/8/7k w - c6 0 1",
+                    "4r1k1/8/8/8/8/3n4/3B4/4K2R w K - 0 1"):
+            board = Board(fen)
+            boards.append(board)
+            # Add every position one move later
+            for move in MoveGenerator(board).generate_legal_moves():
+                boards.append(board.make_move(move))
+        
+        masks, counts = batch.generate_move_masks(*batch.boards_to_arrays(boards))
+        for i, board in enumerate(boards):
+            moves = MoveGenerator(board).generate_legal_moves()
+            self.assertEqual(counts[i], len(moves))
+            for move in moves:
+                self.assertTrue(int(masks[i, move.from_index]) >> move.to_index & 1)
+        
+        # Attack maps match the scalar attack detection
+        attacks = batch.attack_maps(batch.boards_to_arrays(boards[:10])[0], 1)
+        for i, board in enumerate(boards[:10]):
+            expected = sum(1 << square for square in range(64) if board.attackers_to(square, 1))
+            self.assertEqual(int(attacks[i]), expected)
+    
+    def test_perft(self):
+        """Test move generation node counts against known perft results"""
+        self.assertEqual(perft(Board(), 3), 8902)
+        self.assertEqual(perft(Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"), 2), 2039)
+        self.assertEqual(perft(Board("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"), 3), 2812)
+        
+        # Same counts when transposed subtrees come from the hash table
+        table = PerftTable(1)
+        self.assertEqual(perft(Board(), 4, table=table), 197281)
+        self.assertGreater(table.hits, 0)
+        self.assertEqual(table.get(Board().zobrist_key, 4), 197281)
+        self.assertIsNone(table.get(Board().zobrist_key, 3))
+    
+    def test_parallel_perft(self):
+        """Test that perft split across worker processes merges to the serial counts"""
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        self.assertEqual(parallel_perft(board, 2, workers=2), 2039)
+        
+        # Few root moves for the workers: split one ply deeper
+        board = Board("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+        counts = parallel_perft_counts(board, 3, workers=4, hash_mb=1)
+        self.assertEqual(len(counts), 14)
+        self.assertEqual(sum(nodes for _, nodes in counts), 2812)
+        for move, nodes in counts:
+            board.push(move)
+            self.assertEqual(nodes, perft(board, 2))
+            board.pop()
 
 if __name__ == "__main__":
     unittest.main()
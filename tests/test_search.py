@@ -0,0 +1,223 @@
+import unittest
+from Chess_Engine_in_python.engine.board import Board
+from Chess_Engine_in_python.engine.move import Move, MoveGenerator, MovePicker
+from Chess_Engine_in_python.engine.search import Search, SearchPly, MAX_PLY
+from Chess_Engine_in_python.engine.transposition import (
+    TranspositionTable, BUCKET_SIZE, EXACT, LOWER_BOUND, UPPER_BOUND
+)
+
+class TestSearch(unittest.TestCase):
+    def test_mate_in_one(self):
+        """Test that the search finds a back-rank mate"""
+        board = Board("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+        search = Search(board, max_depth=2)
+        score, move = search.alpha_beta(search.board, 2, float('-inf'), float('inf'), True)
+        self.assertEqual(move, Move((7, 0), (0, 0)))
+        
+        # The search works on its own copy of the board
+        self.assertEqual(search.board.to_fen(), board.to_fen())
+    
+    def test_quiescence(self):
+        """Test that the horizon resolves captures and counts quiescence nodes apart"""
+        # At depth 1 the queen would win a rook if the recapture were not seen
+        board = Board("4k3/8/8/3q4/8/8/3R4/3RK3 b - - 0 1")
+        search = Search(board, max_depth=1)
+        search.verbose = False
+        move = search.iterative_deepening(10)
+        self.assertNotEqual(move, Move((3, 3), (6, 3)))
+        self.assertGreater(search.qnodes_count, 0)
+        self.assertEqual(search.total_qnodes, search.qnodes_count)
+        
+        # Horizon nodes count once, in nodes_count: without captures there are no quiescence nodes
+        search = Search(Board(), max_depth=1)
+        search.verbose = False
+        search.iterative_deepening(10)
+        self.assertEqual((search.nodes_count, search.qnodes_count), (21, 0))
+        
+        # Stand pat in a quiet position, mate when in check without evasions
+        search = Search(Board())
+        static = search.evaluator.evaluate(search.board)
+        self.assertEqual(search.quiescence(search.board, float('-inf'), float('inf'), True, 0), static)
+        board = Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 0 1")
+        search = Search(board)
+        self.assertEqual(search.quiescence(search.board, float('-inf'), float('inf'), True, 0), -20000)
+    
+    def test_search_stack(self):
+        """Test the preallocated per-ply search stack"""
+        search = Search(Board(), max_depth=3)
+        self.assertEqual(len(search.stack), MAX_PLY + 1)
+        stack = list(search.stack)
+        
+        search.alpha_beta(search.board, 3, float('-inf'), float('inf'), True)
+        self.assertTrue(all(a is b for a, b in zip(stack, search.stack)))
+        
+        # Each ply keeps one NodeContext (and its generator) across nodes and searches
+        contexts = [ply_state.context for ply_state in search.stack[:4]]
+        self.assertTrue(all(contexts))
+        search.transposition_table.clear()
+        search.alpha_beta(search.board, 3, float('-inf'), float('inf'), True)
+        self.assertTrue(all(a is b.context for a, b in zip(contexts, search.stack)))
+        
+        # Killers are only ever quiet moves
+        for ply_state in search.stack[:3]:
+            for killer in ply_state.killers:
+                if killer is not None:
+                    self.assertFalse(killer.is_capture)
+    
+    def test_order_moves(self):
+        """Test that move ordering sorts the list in place and keeps every move"""
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        search = Search(board)
+        ply_state = SearchPly()
+        moves = MoveGenerator(board).generate_legal_moves()
+        codes = sorted(move.code for move in moves)
+        
+        ordered = search._order_moves(board, moves, ply_state)
+        self.assertIs(ordered, moves)
+        self.assertEqual(sorted(move.code for move in ordered), codes)
+        
+        # Captures of the most valuable pieces come first
+        self.assertTrue(ordered[0].is_capture)
+    
+    def test_history_and_killers(self):
+        """Test that cutoffs feed the history table and the killers, and how both order quiet moves"""
+        board = Board()
+        search = Search(board, max_depth=3)
+        search.verbose = False
+        search.iterative_deepening(30)
+        self.assertTrue(any(search.history))
+        
+        # Aging halves every score
+        history = list(search.history)
+        search._age_history()
+        self.assertEqual(search.history, [score >> 1 for score in history])
+        
+        # History comes first, then the center bonus (pawns and knights)
+        ply_state = SearchPly()
+        moves = MoveGenerator(board).generate_legal_moves()
+        search.history = [0] * len(search.history)
+        ordered = search._order_moves(board, moves, ply_state)
+        self.assertEqual(set(ordered[:8]), {Move((6, file), (rank, file)) for file in range(2, 6) for rank in (4, 5)})
+        self.assertEqual(set(ordered[8:10]), {Move((7, 1), (5, 2)), Move((7, 6), (5, 5))})
+        h3 = Move((6, 7), (5, 7))
+        search._update_history(0, h3, 8)
+        ordered = search._order_moves(board, moves, ply_state)
+        self.assertEqual(ordered[0], h3)
+        
+        # In the picker alpha_beta builds, a stored killer follows the captures,
+        # ahead of the quiet moves ordered by history, and is yielded only once
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        search = Search(board)
+        ply_state = search.stack[0]
+        killer, g3 = Move((6, 0), (5, 0)), Move((6, 6), (5, 6))
+        search._store_killer(ply_state, killer)
+        search._update_history(0, g3, 8)
+        picked = list(MovePicker(board, None, ply_state.killers, order_quiets=search._order_quiets,
+                                 buffers=ply_state))
+        captures = sum(move.is_capture for move in picked)
+        self.assertTrue(all(move.is_capture for move in picked[:captures]))
+        self.assertEqual(picked[captures:captures + 2], [killer, g3])
+        self.assertEqual(picked.count(killer), 1)
+    
+    def test_transposition_table(self):
+        """Test packing, bounded size and depth/age preferred replacement"""
+        table = TranspositionTable(1)
+        self.assertEqual(len(table.entries) * 8, 1024 * 1024)
+        self.assertIsNone(table.probe(12345))
+        
+        table.store(12345, 5, LOWER_BOUND, -20000, 0x1234)
+        self.assertEqual(table.probe(12345), (5, LOWER_BOUND, -20000, 0x1234))
+        
+        # Updating a position keeps its best move when none is given
+        table.store(12345, 6, UPPER_BOUND, 37)
+        self.assertEqual(table.probe(12345), (6, UPPER_BOUND, 37, 0x1234))
+        
+        # A full bucket evicts its shallowest entry
+        stride = table.mask + 1
+        keys = [7 + stride * i for i in range(BUCKET_SIZE + 1)]
+        for depth, key in enumerate(keys[:BUCKET_SIZE]):
+            table.store(key, depth + 1, EXACT, 0)
+        table.store(keys[-1], 3, EXACT, 0)
+        self.assertIsNone(table.probe(keys[0]))
+        self.assertIsNotNone(table.probe(keys[1]))
+        
+        # ...but entries from older searches go first, however deep
+        table.new_search()
+        table.store(keys[0], 1, EXACT, 0)
+        self.assertIsNotNone(table.probe(keys[0]))
+        self.assertEqual(sum(table.probe(key) is not None for key in keys), BUCKET_SIZE)
+        
+        # Hashfull samples the first thousand entries: one in each bucket is 250 permille,
+        # and entries of an older search do not count
+        table.clear()
+        self.assertEqual(table.hashfull(), 0)
+        for key in range(table.mask + 1):
+            table.store(key, 1, EXACT, 0)
+        self.assertEqual(table.hashfull(), 250)
+        table.new_search()
+        self.assertEqual(table.hashfull(), 0)
+        
+        table.clear()
+        self.assertIsNone(table.probe(12345))
+    
+    def test_search_uses_transposition_table(self):
+        """Test that the search stores bounded results and reuses the hash move"""
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        search = Search(board, max_depth=3, hash_mb=1)
+        score, move = search.alpha_beta(search.board, 3, float('-inf'), float('inf'), True)
+        depth, bound, stored_score, move_code = search.transposition_table.probe(board.zobrist_key)
+        self.assertEqual((depth, bound, stored_score, move_code), (3, EXACT, score, move.code))
+        
+        # A second search of the same position is answered from the table
+        nodes = search.nodes_count
+        search.alpha_beta(search.board, 3, float('-inf'), float('inf'), True)
+        self.assertLess(search.nodes_count - nodes, nodes)
+    
+    def test_shared_transposition_table(self):
+        """Test that tables over one buffer see each other's entries"""
+        buffer = bytearray(TranspositionTable.table_bytes(1))
+        first = TranspositionTable(1, buffer)
+        second = TranspositionTable(1, buffer)
+        first.store(98765, 4, EXACT, 12, 0x0abc)
+        self.assertEqual(second.probe(98765), (4, EXACT, 12, 0x0abc))
+        
+        # A half-written entry fails the key check instead of returning bad data
+        slot = next(i for i in range(0, len(buffer) // 8, 2) if second.entries[i + 1])
+        second.entries[slot + 1] ^= 1 << 40
+        self.assertIsNone(first.probe(98765))
+    
+    def test_lazy_smp_search(self):
+        """Test that the Lazy SMP search finds a mate with helper processes"""
+        from Chess_Engine_in_python.engine.parallel import LazySMPSearch
+        
+        board = Board("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+        search = LazySMPSearch(board, max_depth=2, workers=2, hash_mb=1)
+        search.verbose = False
+        self.assertEqual(search.iterative_deepening(10), Move((7, 0), (0, 0)))
+        self.assertEqual(search.completed_depth, 2)
+        self.assertEqual(search.pv[0], Move((7, 0), (0, 0)))
+        self.assertGreater(search.total_nodes, 0)
+    
+    def test_root_split_search(self):
+        """Test that root splitting agrees with the serial search whatever the worker count"""
+        from Chess_Engine_in_python.engine.parallel import RootSplitSearch
+        
+        board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        serial = Search(board, hash_mb=1)
+        score, move = serial.alpha_beta(serial.board, 2, float('-inf'), float('inf'), True)
+        
+        results = []
+        for workers in (1, 2):
+            search = RootSplitSearch(board, max_depth=2, workers=workers, hash_mb=1)
+            search.verbose = False
+            results.append((search.iterative_deepening(30), search.best_score, search.root_moves))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][:2], (move, score))
+        
+        # Every root move is reported once, the previous best first
+        root_moves = results[0][2]
+        self.assertEqual(len(root_moves), len(MoveGenerator(board).generate_legal_moves()))
+        self.assertTrue(all(nodes > 0 for _, _, nodes in root_moves))
+
+if __name__ == "__main__":
+    unittest.main()
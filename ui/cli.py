@@ -4,14 +4,20 @@ import time
 
 from Chess_Engine_in_python.engine.board import Board, Color, PieceType
 from Chess_Engine_in_python.engine.move import Move, MoveGenerator
+from Chess_Engine_in_python.engine.move_cache import MoveCache
 from Chess_Engine_in_python.engine.search import Search
+from Chess_Engine_in_python.engine.parallel import LazySMPSearch
 
 class CLI:
-    def __init__(self, board, depth=4, time_limit=5.0):
+    def __init__(self, board, depth=4, time_limit=5.0, workers=1):
         self.board = board
         self.depth = depth
         self.time_limit = time_limit
-        self.move_generator = MoveGenerator(board)
+        # Search processes; more than one searches with Lazy SMP
+        self.workers = workers
+        # Legal moves of positions already seen, shared across moves and clicks
+        self.move_cache = MoveCache()
+        self.move_generator = MoveGenerator(board, self.move_cache)
     
     def run(self):
         """Run the CLI interface"""
@@ -48,11 +54,17 @@ class CLI:
                     print(f"Search time limit set to {self.time_limit} seconds")
                 except (IndexError, ValueError):
                     print("Invalid time value")
+            elif command.startswith("workers "):
+                try:
+                    self.workers = max(1, int(command.split()[1]))
+                    print(f"Search workers set to {self.workers}")
+                except (IndexError, ValueError):
+                    print("Invalid workers value")
             elif command.startswith("position "):
                 try:
                     fen = command[9:].strip()
                     self.board = Board(fen)
-                    self.move_generator = MoveGenerator(self.board)
+                    self.move_generator = MoveGenerator(self.board, self.move_cache)
                     print("Position set")
                 except Exception as e:
                     print(f"Error setting position: {e}")
@@ -72,6 +84,7 @@ class CLI:
         print("  go         - Let the computer make a move")
         print("  depth N    - Set search depth to N")
         print("  time N     - Set search time limit to N seconds")
+        print("  workers N  - Search with N processes (Lazy SMP)")
         print("  position FEN - Set the board position from FEN string")
         print("  e2e4       - Make a move (in coordinate notation)")
     
@@ -124,7 +137,7 @@ class CLI:
         
         if matching_move:
             self.board = self.board.make_move(matching_move)
-            self.move_generator = MoveGenerator(self.board)
+            self.move_generator = MoveGenerator(self.board, self.move_cache)
             print(f"Move: {move_str}")
         else:
             print("Illegal move")
@@ -134,14 +147,17 @@ class CLI:
         print("Thinking...")
         start_time = time.time()
         
-        search = Search(self.board, self.depth)
+        if self.workers > 1:
+            search = LazySMPSearch(self.board, self.depth, self.workers)
+        else:
+            search = Search(self.board, self.depth)
         best_move = search.iterative_deepening(self.time_limit)
         
         elapsed = time.time() - start_time
         
         if best_move:
             self.board = self.board.make_move(best_move)
-            self.move_generator = MoveGenerator(self.board)
+            self.move_generator = MoveGenerator(self.board, self.move_cache)
             print(f"Computer move: {best_move} (in {elapsed:.2f}s)")
         else:
             print("No legal moves available")
@@ -10,14 +10,20 @@ except ImportError:
 
 from Chess_Engine_in_python.engine.board import Board, Color, PieceType
 from Chess_Engine_in_python.engine.move import Move, MoveGenerator
+from Chess_Engine_in_python.engine.move_cache import MoveCache
 from Chess_Engine_in_python.engine.search import Search
+from Chess_Engine_in_python.engine.parallel import LazySMPSearch
 
 class GUI:
-    def __init__(self, board, depth=4, time_limit=5.0):
+    def __init__(self, board, depth=4, time_limit=5.0, workers=1):
         self.board = board
         self.depth = depth
         self.time_limit = time_limit
-        self.move_generator = MoveGenerator(board)
+        # Search processes; more than one searches with Lazy SMP
+        self.workers = workers
+        # Legal moves of positions already seen, shared across moves and clicks
+        self.move_cache = MoveCache()
+        self.move_generator = MoveGenerator(board, self.move_cache)
         
         # Track player color (player is white by default)
         self.player_color = Color.WHITE
@@ -126,6 +132,7 @@ class GUI:
         settings_menu = tk.Menu(menubar, tearoff=0)
         settings_menu.add_command(label="Set Search Depth", command=self.set_depth)
         settings_menu.add_command(label="Set Time Limit", command=self.set_time_limit)
+        settings_menu.add_command(label="Set Search Workers", command=self.set_workers)
         menubar.add_cascade(label="Settings", menu=settings_menu)
         
         # Help menu
@@ -249,22 +256,12 @@ class GUI:
         # Check if game is already over
         if self.check_game_end():
             return
-            
-        # Get all legal moves for the current position
-        all_legal_moves = self.move_generator.generate_legal_moves()
         
-        # Filter moves to ensure they don't leave the king in check
-        legal_moves = []
-        for move in all_legal_moves:
-            if self.is_move_legal(move):
-                legal_moves.append(move)
+        # Get all legal moves for the current position
+        legal_moves = self.move_generator.generate_legal_moves()
         
         # Check if king is in check
-        king_pos = self.find_king_position(self.board.active_color)
-        is_in_check = king_pos and self.board.is_square_attacked(
-            king_pos[0], king_pos[1], 
-            Color.BLACK if self.board.active_color == Color.WHITE else Color.WHITE
-        )
+        is_in_check = self.move_generator.is_check()
         
         if is_in_check:
             self.status_var.set(f"{'White' if self.board.active_color == Color.WHITE else 'Black'} is in check!")
@@ -310,7 +307,7 @@ class GUI:
                     
                     # Make the move
                     self.board = self.board.make_move(move)
-                    self.move_generator = MoveGenerator(self.board)
+                    self.move_generator = MoveGenerator(self.board, self.move_cache)
                     
                     # Update status
                     self.status_var.set(f"{'White' if self.board.active_color == Color.WHITE else 'Black'} to move")
@@ -371,7 +368,7 @@ class GUI:
         # Check if game is already over
         if self.check_game_end():
             return
-            
+        
         # Ensure it's the computer's turn
         if (self.board.active_color == Color.WHITE and self.player_color == Color.WHITE) or \
            (self.board.active_color == Color.BLACK and self.player_color == Color.BLACK):
@@ -383,6 +380,19 @@ class GUI:
         
         # Run search in a separate thread to keep UI responsive
         def search_thread():
+            if self.workers > 1:
+                # Worker processes search the whole time; results arrive at the end
+                search = LazySMPSearch(self.board, self.depth, self.workers)
+                start_time = time.time()
+                best_move = search.iterative_deepening(self.time_limit)
+                if best_move:
+                    self.best_move = best_move
+                    self.root.after(0, lambda d=search.completed_depth, s=search.best_score, n=search.total_nodes,
+                                    t=time.time() - start_time, m=str(best_move):
+                                    self.update_info_labels(d, s, n, t, m))
+                finish_search(best_move)
+                return
+            
             search = Search(self.board, self.depth)
             start_time = time.time()
             
@@ -391,7 +401,8 @@ class GUI:
             
             for current_depth in range(1, self.depth + 1):
                 search.max_depth = current_depth
-                score, move = search.alpha_beta(self.board, current_depth, float('-inf'), float('inf'), True)
+                score, move = search.alpha_beta(search.board, current_depth, float('-inf'), float('inf'),
+                                                search.board.active_color == Color.WHITE)
                 
                 elapsed = time.time() - start_time
                 nodes = search.nodes_count if hasattr(search, 'nodes_count') else 0
@@ -419,10 +430,13 @@ class GUI:
                 if elapsed >= self.time_limit * 0.8:
                     break
             
+            finish_search(best_move)
+        
+        def finish_search(best_move):
             # Make the best move found
             if best_move:
                 self.board = self.board.make_move(best_move)
-                self.move_generator = MoveGenerator(self.board)
+                self.move_generator = MoveGenerator(self.board, self.move_cache)
                 
                 # Update UI from the main thread
                 self.root.after(0, lambda: self.status_var.set(
@@ -441,20 +455,11 @@ class GUI:
         # If game is already marked as over, return True
         if self.game_over:
             return True
-            
-        # Generate legal moves - these should already filter out moves that leave the king in check
-        legal_moves = self.move_generator.generate_legal_moves()
-        
-        # Find king position
-        king_pos = self.find_king_position(self.board.active_color)
         
         # Check if king is in check
-        is_in_check = king_pos and self.board.is_square_attacked(
-            king_pos[0], king_pos[1], 
-            Color.BLACK if self.board.active_color == Color.WHITE else Color.WHITE
-        )
+        is_in_check = self.move_generator.is_check()
         
-        if not legal_moves:
+        if not self.move_generator.has_legal_move():
             if is_in_check:
                 # Checkmate
                 winner = "Black" if self.board.active_color == Color.WHITE else "White"
@@ -478,7 +483,7 @@ class GUI:
     def new_game(self):
         """Start a new game"""
         self.board = Board()
-        self.move_generator = MoveGenerator(self.board)
+        self.move_generator = MoveGenerator(self.board, self.move_cache)
         self.selected_square = None
         self.legal_moves = []
         self.game_over = False
@@ -501,7 +506,7 @@ class GUI:
             try:
                 fen = fen_entry.get()
                 self.board = Board(fen)
-                self.move_generator = MoveGenerator(self.board)
+                self.move_generator = MoveGenerator(self.board, self.move_cache)
                 self.selected_square = None
                 self.legal_moves = []
                 self.status_var.set(f"{'White' if self.board.active_color == Color.WHITE else 'Black'} to move")
@@ -526,6 +531,13 @@ class GUI:
         if time_limit:
             self.time_limit = time_limit
     
+    def set_workers(self):
+        """Set the number of search processes"""
+        workers = tk.simpledialog.askinteger("Search Workers", "Enter number of search processes:",
+                                            initialvalue=self.workers, minvalue=1, maxvalue=64)
+        if workers:
+            self.workers = workers
+    
     def show_about(self):
         """Show about dialog"""
         messagebox.showinfo("About", "Chess Engine\nA simple chess engine written in Python")
@@ -559,11 +571,11 @@ class GUI:
         
         tk.Button(button_frame, text="White", command=set_white).pack(side=tk.LEFT, expand=True, padx=10)
         tk.Button(button_frame, text="Black", command=set_black).pack(side=tk.RIGHT, expand=True, padx=10)
-        
+    
     def run(self):
         """Run the GUI"""
         self.root.mainloop()
-        
+    
     def update_info_labels(self, depth, score, nodes, elapsed, move_str):
         """Update the information labels with search results"""
         self.eval_label.config(text=f"Evaluation: {score/100:.2f}")
@@ -573,36 +585,11 @@ class GUI:
         
         # Force update of GUI
         self.root.update_idletasks()
-
+    
     def find_king_position(self, color):
         """Find the position of the king of the given color"""
-        for rank in range(8):
-            for file in range(8):
-                piece = self.board.get_piece_at(rank, file)
-                if piece and piece.piece_type == PieceType.KING and piece.color == color:
-                    return (rank, file)
-        return None
-
+        return self.board.find_king(color)
+    
     def is_move_legal(self, move):
         """Check if a move is legal (doesn't leave the king in check)"""
-        # Make the move on a temporary board
-        temp_board = self.board.make_move(move)
-        
-        # Find the king position after the move
-        king_pos = None
-        for rank in range(8):
-            for file in range(8):
-                piece = temp_board.get_piece_at(rank, file)
-                if piece and piece.piece_type == PieceType.KING and piece.color == self.board.active_color:
-                    king_pos = (rank, file)
-                    break
-            if king_pos:
-                break
-        
-        # If king not found, move is illegal
-        if not king_pos:
-            return False
-        
-        # Check if king is attacked after the move
-        opponent_color = Color.BLACK if self.board.active_color == Color.WHITE else Color.WHITE
-        return not temp_board.is_square_attacked(king_pos[0], king_pos[1], opponent_color)
+        return self.move_generator.is_move_legal(move)
\ No newline at end of file
@@ -165,24 +165,106 @@ class BitBoardPatterns:
     @staticmethod
     def pawn_attacks(square, color):
         """Create a bitboard with all possible pawn attacks from the square"""
-        from chess_engine.engine.board import Color
-        
-        rank, file = square // 8, square % 8
+        # White pawns attack diagonally up, black pawns diagonally down
+        rank_step = -1 if color.name == 'WHITE' else 1
+        return BitBoard(_pawn_attack_mask(square, rank_step))
+    
+    @staticmethod
+    def ray(square, rank_step, file_step):
+        """Create a bitboard of the squares from the square (exclusive) to the board edge"""
+        rank, file = square // 8 + rank_step, square % 8 + file_step
         mask = 0
         
-        if color == Color.WHITE:
-            # White pawns attack diagonally up
-            if rank > 0:
-                if file > 0:
-                    mask |= 1 << ((rank-1) * 8 + file-1)
-                if file < 7:
-                    mask |= 1 << ((rank-1) * 8 + file+1)
-        else:
-            # Black pawns attack diagonally down
-            if rank < 7:
-                if file > 0:
-                    mask |= 1 << ((rank+1) * 8 + file-1)
-                if file < 7:
-                    mask |= 1 << ((rank+1) * 8 + file+1)
+        while 0 <= rank < 8 and 0 <= file < 8:
+            mask |= 1 << (rank * 8 + file)
+            rank += rank_step
+            file += file_step
         
         return BitBoard(mask)
+
+def _pawn_attack_mask(square, rank_step):
+    """Squares diagonally ahead of a pawn moving rank_step ranks per move"""
+    rank, file = square // 8, square % 8
+    mask = 0
+    
+    if 0 <= rank + rank_step < 8:
+        if file > 0:
+            mask |= 1 << ((rank + rank_step) * 8 + file - 1)
+        if file < 7:
+            mask |= 1 << ((rank + rank_step) * 8 + file + 1)
+    
+    return mask
+
+# Precomputed attack tables as plain ints, indexed by square (0 = a8, 63 = h1)
+KNIGHT_ATTACKS = [BitBoardPatterns.knight_attacks(square).value for square in range(64)]
+KING_ATTACKS = [BitBoardPatterns.king_attacks(square).value for square in range(64)]
+
+# Pawn attacks indexed [color index][square], color index 0 for white and 1 for black
+PAWN_ATTACKS = [
+    [_pawn_attack_mask(square, -1) for square in range(64)],
+    [_pawn_attack_mask(square, 1) for square in range(64)],
+]
+
+# Rays to the board edge indexed by square. Rays towards higher square indices
+# (south and east) find their first blocker with the lowest set bit, the others
+# with the highest set bit.
+NORTH_RAYS = [BitBoardPatterns.ray(square, -1, 0).value for square in range(64)]
+SOUTH_RAYS = [BitBoardPatterns.ray(square, 1, 0).value for square in range(64)]
+EAST_RAYS = [BitBoardPatterns.ray(square, 0, 1).value for square in range(64)]
+WEST_RAYS = [BitBoardPatterns.ray(square, 0, -1).value for square in range(64)]
+NORTH_EAST_RAYS = [BitBoardPatterns.ray(square, -1, 1).value for square in range(64)]
+NORTH_WEST_RAYS = [BitBoardPatterns.ray(square, -1, -1).value for square in range(64)]
+SOUTH_EAST_RAYS = [BitBoardPatterns.ray(square, 1, 1).value for square in range(64)]
+SOUTH_WEST_RAYS = [BitBoardPatterns.ray(square, 1, -1).value for square in range(64)]
+
+def _between_mask(a, b):
+    """Squares strictly between two squares on a shared rank, file or diagonal (0 if not aligned)"""
+    rank_diff, file_diff = (b >> 3) - (a >> 3), (b & 7) - (a & 7)
+    if a == b or (rank_diff and file_diff and abs(rank_diff) != abs(file_diff)):
+        return 0
+    
+    step = (rank_diff > 0) - (rank_diff < 0), (file_diff > 0) - (file_diff < 0)
+    mask = 0
+    rank, file = (a >> 3) + step[0], (a & 7) + step[1]
+    while rank * 8 + file != b:
+        mask |= 1 << (rank * 8 + file)
+        rank += step[0]
+        file += step[1]
+    return mask
+
+# Squares strictly between two aligned squares, indexed [square][square]
+BETWEEN = [[_between_mask(a, b) for b in range(64)] for a in range(64)]
+
+def _positive_ray_attacks(rays, square, occupied):
+    """Attacks along a ray towards higher square indices, stopping at the first blocker"""
+    attacks = rays[square]
+    blockers = attacks & occupied
+    if blockers:
+        attacks ^= rays[(blockers & -blockers).bit_length() - 1]
+    return attacks
+
+def _negative_ray_attacks(rays, square, occupied):
+    """Attacks along a ray towards lower square indices, stopping at the first blocker"""
+    attacks = rays[square]
+    blockers = attacks & occupied
+    if blockers:
+        attacks ^= rays[blockers.bit_length() - 1]
+    return attacks
+
+def rook_attacks(square, occupied):
+    """Rook attacks (int bitboard) from a square given the occupied squares"""
+    return (_negative_ray_attacks(NORTH_RAYS, square, occupied)
+            | _positive_ray_attacks(SOUTH_RAYS, square, occupied)
+            | _positive_ray_attacks(EAST_RAYS, square, occupied)
+            | _negative_ray_attacks(WEST_RAYS, square, occupied))
+
+def bishop_attacks(square, occupied):
+    """Bishop attacks (int bitboard) from a square given the occupied squares"""
+    return (_negative_ray_attacks(NORTH_EAST_RAYS, square, occupied)
+            | _negative_ray_attacks(NORTH_WEST_RAYS, square, occupied)
+            | _positive_ray_attacks(SOUTH_EAST_RAYS, square, occupied)
+            | _positive_ray_attacks(SOUTH_WEST_RAYS, square, occupied))
+
+def queen_attacks(square, occupied):
+    """Queen attacks (int bitboard) from a square given the occupied squares"""
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
@@ -46,7 +46,7 @@ def generate_fen(board):
         rank_str = ""
         
         for file in range(8):
-            piece = board.squares[rank][file]
+            piece = board.get_piece_at(rank, file)
             
             if piece:
                 if empty_count > 0:
@@ -66,15 +66,16 @@ def generate_fen(board):
     # Active color
     fen_parts.append('w' if board.active_color.name == 'WHITE' else 'b')
     
-    # Castling rights
+    # Castling rights (the Color enum is taken from the board to avoid a circular import)
+    Color = type(board.active_color)
     castling = ""
-    if board.castling_rights[board.Color.WHITE]['kingside']:
+    if board.castling_rights[Color.WHITE]['kingside']:
         castling += 'K'
-    if board.castling_rights[board.Color.WHITE]['queenside']:
+    if board.castling_rights[Color.WHITE]['queenside']:
         castling += 'Q'
-    if board.castling_rights[board.Color.BLACK]['kingside']:
+    if board.castling_rights[Color.BLACK]['kingside']:
         castling += 'k'
-    if board.castling_rights[board.Color.BLACK]['queenside']:
+    if board.castling_rights[Color.BLACK]['queenside']:
         castling += 'q'
     
     fen_parts.append(castling if castling else '-')
@@ -0,0 +1,219 @@
+# Magic-bitboard attack tables for rooks and bishops.
+#
+# The relevant occupancy of a square (blockers that can stop a ray, board edges
+# excluded) is multiplied by a per-square magic number and shifted so that every
+# occupancy maps to its own slot of a shared attack table. Finding magics is slow
+# in pure Python, so the magics and tables are cached in data/magic_tables.bin:
+#
+#     python -m Chess_Engine_in_python.utils.magic --regenerate
+#     python -m Chess_Engine_in_python.utils.magic --verify
+import os
+import random
+import struct
+import sys
+from array import array
+
+from Chess_Engine_in_python.utils.bitboard import (
+    rook_attacks as rook_ray_attacks, bishop_attacks as bishop_ray_attacks
+)
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+TABLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'magic_tables.bin')
+
+# File layout: header, then for rooks and bishops in turn 64 magics ('Q'),
+# 64 shifts ('B') and the attack table ('Q'), all little-endian
+_HEADER = struct.Struct('<4sHII')
+_FILE_TAG = b'MAGC'
+_FILE_VERSION = 1
+
+def _relevant_mask(square, directions):
+    """Squares whose occupancy can block a slider on the square, edges excluded"""
+    rank, file = square // 8, square % 8
+    mask = 0
+    
+    for rank_step, file_step in directions:
+        r, f = rank + rank_step, file + file_step
+        # Stop one square short of the edge in the direction of travel
+        while 0 <= r + rank_step < 8 and 0 <= f + file_step < 8:
+            mask |= 1 << (r * 8 + f)
+            r += rank_step
+            f += file_step
+    
+    return mask
+
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, 1), (0, -1)]
+BISHOP_DIRECTIONS = [(-1, 1), (-1, -1), (1, 1), (1, -1)]
+
+ROOK_MASKS = [_relevant_mask(square, ROOK_DIRECTIONS) for square in range(64)]
+BISHOP_MASKS = [_relevant_mask(square, BISHOP_DIRECTIONS) for square in range(64)]
+
+def _subsets(mask):
+    """All subsets of a bitboard (Carry-Rippler enumeration)"""
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if subset == 0:
+            return
+
+def _find_magic(square, mask, reference, rng):
+    """Search for a magic number mapping every occupancy of mask without harmful collisions"""
+    bits = mask.bit_count()
+    shift = 64 - bits
+    occupancies = list(_subsets(mask))
+    attacks = [reference(square, occupancy) for occupancy in occupancies]
+    
+    while True:
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        # Good magics spread the mask's bits into the top byte
+        if (((mask * magic) & MASK64) >> 56).bit_count() < 6:
+            continue
+        
+        table = [None] * (1 << bits)
+        for occupancy, attack in zip(occupancies, attacks):
+            index = ((occupancy * magic) & MASK64) >> shift
+            if table[index] is None:
+                table[index] = attack
+            elif table[index] != attack:
+                break
+        else:
+            # Unused slots are never looked up
+            return magic, shift, [attack or 0 for attack in table]
+
+def generate_tables(seed=0x3A61C):
+    """Find magics and build the rook and bishop tables (slow)"""
+    rng = random.Random(seed)
+    tables = {}
+    
+    for name, masks, reference in (('rook', ROOK_MASKS, rook_ray_attacks),
+                                   ('bishop', BISHOP_MASKS, bishop_ray_attacks)):
+        magics, shifts, attacks = array('Q'), array('B'), array('Q')
+        for square in range(64):
+            magic, shift, table = _find_magic(square, masks[square], reference, rng)
+            magics.append(magic)
+            shifts.append(shift)
+            attacks.extend(table)
+        tables[name] = (magics, shifts, attacks)
+    
+    return tables
+
+def save_tables(tables, path=TABLE_PATH):
+    """Write the tables to the binary cache file"""
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_FILE_TAG, _FILE_VERSION,
+                             len(tables['rook'][2]), len(tables['bishop'][2])))
+        for name in ('rook', 'bishop'):
+            for values in tables[name]:
+                if sys.byteorder == 'big' and values.itemsize > 1:
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                f.write(values.tobytes())
+
+def load_tables(path=TABLE_PATH):
+    """Read the tables from the binary cache file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    tag, version, rook_size, bishop_size = _HEADER.unpack_from(data)
+    if tag != _FILE_TAG or version != _FILE_VERSION:
+        raise ValueError(f"Unrecognised magic table file {path}")
+    
+    tables = {}
+    offset = _HEADER.size
+    for name, size in (('rook', rook_size), ('bishop', bishop_size)):
+        arrays = []
+        for typecode, count in (('Q', 64), ('B', 64), ('Q', size)):
+            values = array(typecode)
+            end = offset + count * values.itemsize
+            values.frombytes(data[offset:end])
+            if sys.byteorder == 'big' and values.itemsize > 1:
+                values.byteswap()
+            arrays.append(values)
+            offset = end
+        tables[name] = tuple(arrays)
+    
+    if offset != len(data):
+        raise ValueError(f"Truncated or oversized magic table file {path}")
+    return tables
+
+def verify_tables(tables):
+    """Check every occupancy of every square against the ray-scan attacks"""
+    for name, masks, reference in (('rook', ROOK_MASKS, rook_ray_attacks),
+                                   ('bishop', BISHOP_MASKS, bishop_ray_attacks)):
+        magics, shifts, attacks = tables[name]
+        offset = 0
+        for square in range(64):
+            for occupancy in _subsets(masks[square]):
+                index = offset + (((occupancy * magics[square]) & MASK64) >> shifts[square])
+                if attacks[index] != reference(square, occupancy):
+                    return False
+            offset += 1 << (64 - shifts[square])
+        if offset != len(attacks):
+            return False
+    return True
+
+def _load_or_generate():
+    """Load the cached tables, regenerating them if the file is missing or invalid"""
+    try:
+        return load_tables()
+    except (OSError, ValueError, struct.error):
+        tables = generate_tables()
+        try:
+            save_tables(tables)
+        except OSError:
+            pass
+        return tables
+
+_tables = _load_or_generate()
+
+ROOK_MAGICS, ROOK_SHIFTS, ROOK_TABLE = _tables['rook']
+BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_TABLE = _tables['bishop']
+
+def _offsets(shifts):
+    """Start of each square's slice of the attack table"""
+    offsets, offset = [], 0
+    for shift in shifts:
+        offsets.append(offset)
+        offset += 1 << (64 - shift)
+    return offsets
+
+ROOK_OFFSETS = _offsets(ROOK_SHIFTS)
+BISHOP_OFFSETS = _offsets(BISHOP_SHIFTS)
+
+# Per-square (mask, magic, shift, offset) tuples so a lookup is a single index
+_ROOK_ENTRIES = list(zip(ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_OFFSETS))
+_BISHOP_ENTRIES = list(zip(BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_OFFSETS))
+
+def rook_attacks(square, occupied):
+    """Rook attacks (int bitboard) from a square given the occupied squares"""
+    mask, magic, shift, offset = _ROOK_ENTRIES[square]
+    return ROOK_TABLE[offset + ((((occupied & mask) * magic) & MASK64) >> shift)]
+
+def bishop_attacks(square, occupied):
+    """Bishop attacks (int bitboard) from a square given the occupied squares"""
+    mask, magic, shift, offset = _BISHOP_ENTRIES[square]
+    return BISHOP_TABLE[offset + ((((occupied & mask) * magic) & MASK64) >> shift)]
+
+def queen_attacks(square, occupied):
+    """Queen attacks (int bitboard) from a square given the occupied squares"""
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    
+    parser = argparse.ArgumentParser(description='Magic bitboard table maintenance')
+    parser.add_argument('--regenerate', action='store_true', help='Find new magics and rewrite the table file')
+    parser.add_argument('--verify', action='store_true', help='Check the table file against ray-scan attacks')
+    args = parser.parse_args()
+    
+    if args.regenerate:
+        start_time = time.time()
+        save_tables(generate_tables())
+        print(f"Wrote {os.path.normpath(TABLE_PATH)} in {time.time() - start_time:.1f}s")
+    
+    if args.verify or not args.regenerate:
+        ok = verify_tables(load_tables())
+        print("Magic tables OK" if ok else "Magic tables INVALID")
+        sys.exit(0 if ok else 1)
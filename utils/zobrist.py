@@ -1,53 +1,49 @@
 import random
-from Chess_Engine_in_python.engine.board import PieceType, Color
+
+# Fixed seed so keys are identical in every process (worker pools, saved tables)
+_rng = random.Random(0x5EED)
+
+# Random numbers for each piece at each square, indexed by piece_index * 64 + square
+PIECE_KEYS = [_rng.getrandbits(64) for _ in range(12 * 64)]
+
+# Random numbers for castling rights: white kingside, white queenside,
+# black kingside, black queenside
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(4)]
+
+# Random numbers for en passant files
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]
+
+# Random number for side to move (set when black is to move)
+SIDE_TO_MOVE_KEY = _rng.getrandbits(64)
 
 class ZobristHash:
     def __init__(self):
-        # Initialize random numbers for each piece at each position
-        self.piece_keys = {}
-        for piece_type in PieceType:
-            for color in Color:
-                for rank in range(8):
-                    for file in range(8):
-                        self.piece_keys[(piece_type, color, rank, file)] = random.getrandbits(64)
-        
-        # Random numbers for castling rights
-        self.castling_keys = {
-            (Color.WHITE, 'kingside'): random.getrandbits(64),
-            (Color.WHITE, 'queenside'): random.getrandbits(64),
-            (Color.BLACK, 'kingside'): random.getrandbits(64),
-            (Color.BLACK, 'queenside'): random.getrandbits(64)
-        }
-        
-        # Random numbers for en passant files
-        self.en_passant_keys = {}
-        for file in range(8):
-            self.en_passant_keys[file] = random.getrandbits(64)
-        
-        # Random number for side to move
-        self.side_to_move_key = random.getrandbits(64)
+        self.piece_keys = PIECE_KEYS
+        self.castling_keys = CASTLING_KEYS
+        self.en_passant_keys = EN_PASSANT_KEYS
+        self.side_to_move_key = SIDE_TO_MOVE_KEY
     
     def hash(self, board):
-        """Compute Zobrist hash for a board position"""
+        """Compute Zobrist hash for a board position from scratch"""
+        from Chess_Engine_in_python.engine.board import Color
+        
         h = 0
         
         # Hash pieces
-        for rank in range(8):
-            for file in range(8):
-                piece = board.get_piece_at(rank, file)
-                if piece:
-                    h ^= self.piece_keys[(piece.piece_type, piece.color, rank, file)]
+        for index, bitboard in enumerate(board.bitboards):
+            while bitboard:
+                square = (bitboard & -bitboard).bit_length() - 1
+                h ^= self.piece_keys[index * 64 + square]
+                bitboard &= bitboard - 1
         
         # Hash castling rights
-        for color in Color:
-            for side in ['kingside', 'queenside']:
-                if board.castling_rights[color][side]:
-                    h ^= self.castling_keys[(color, side)]
+        for i in range(4):
+            if board.castling >> i & 1:
+                h ^= self.castling_keys[i]
         
         # Hash en passant target
-        if board.en_passant_target:
-            ep_rank, ep_file = board.en_passant_target
-            h ^= self.en_passant_keys[ep_file]
+        if board.ep_square >= 0:
+            h ^= self.en_passant_keys[board.ep_square & 7]
         
         # Hash side to move
         if board.active_color == Color.BLACK: